@@ -0,0 +1,269 @@
+"""
+Асинхронные версии самых нагруженных GET-эндпоинтов для запуска под
+ASGI (SERVER_MODE=asgi): список и карточка рецепта, теги и
+автодополнение ингредиентов. Рецепты читаются асинхронным ORM, так что
+ожидание БД и медленного клиента не занимает поток воркера.
+
+Аутентификация, права и фильтры — те же, что у вьюсетов DRF. Другие
+методы, keyset-курсор, ошибки (400, 401, 404) и браузерный API
+обрабатывает синхронный вьюсет: ответ в этих случаях не отличается.
+"""
+
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from django.utils.http import quote_etag
+from rest_framework.exceptions import APIException
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.caching import (
+    make_etag,
+    not_modified,
+    response_cache_key,
+    response_version,
+    set_etag,
+)
+from api.counting import aget_recipe_count
+from api.pagination import RecipeCursorPagination
+from api.serializers import TagSerializer
+from api.views import IngredientViewSet, RecipesViewSet, TagViewSet
+from recipes.catalog import aget_catalog
+from recipes.models import Recipe
+
+LIST_ACTIONS = {"get": "list", "post": "create"}
+DETAIL_ACTIONS = {
+    "get": "retrieve",
+    "put": "update",
+    "patch": "partial_update",
+    "delete": "destroy",
+}
+
+
+class Fallback(Exception):
+    """Запрос отдаётся синхронному вьюсету."""
+
+
+def async_read(viewset, basename, actions, detail=False):
+    """
+    Делает из корутины handler(view, **kwargs) вьюху для GET-запросов
+    к viewset. view — экземпляр вьюсета с аутентифицированным
+    request, как после APIView.initial().
+    """
+    # как роутер и ViewSetMixin.as_view: только действия, которые есть
+    # у вьюсета, и HEAD как GET
+    actions = {
+        method: action for method, action in actions.items()
+        if hasattr(viewset, action)
+    }
+    actions.setdefault("head", actions["get"])
+    fallback = sync_to_async(viewset.as_view(
+        actions, basename=basename, detail=detail
+    ))
+
+    def decorator(handler):
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method != "GET":
+                return await fallback(request, *args, **kwargs)
+            try:
+                instance = await initial(viewset, actions, request, kwargs)
+                response = await handler(instance, **kwargs)
+            except (Fallback, APIException, Http404):
+                return await fallback(request, *args, **kwargs)
+            # заголовки Allow и Vary, как у ответа вьюсета
+            return instance.finalize_response(instance.request, response)
+
+        # как у вьюх DRF; декоратор csrf_exempt в Django 4.2 не
+        # поддерживает корутины
+        view.csrf_exempt = True
+        return view
+
+    return decorator
+
+
+async def initial(viewset, actions, request, kwargs):
+    view = viewset(action_map=actions, action=actions["get"])
+    for method, action in actions.items():
+        setattr(view, method, getattr(view, action))
+    view.args, view.kwargs = (), kwargs
+    view.format_kwarg = None
+    view.request = view.initialize_request(request, **kwargs)
+    view.headers = view.default_response_headers
+    # TokenAuthentication читает токен синхронным ORM
+    await sync_to_async(view.initial)(view.request)
+    if view.request.accepted_renderer.format != "json":
+        raise Fallback
+    return view
+
+
+def render(view, data):
+    request = view.request
+    renderer = request.accepted_renderer
+    return HttpResponse(
+        renderer.render(
+            data, request.accepted_media_type, view.get_renderer_context()
+        ),
+        content_type=renderer.media_type,
+    )
+
+
+async def conditional(view, etag, respond):
+    """conditional_get и cache_anonymous_response для корутин."""
+    request = view.request
+    etag = quote_etag(etag)
+    response = not_modified(request, etag)
+    if response is not None:
+        return set_etag(response, etag)
+    anonymous = not request.user.is_authenticated
+    key = response_cache_key(request) if anonymous else None
+    data = await cache.aget(key) if anonymous else None
+    if data is None:
+        data = await respond()
+        if anonymous:
+            await cache.aset(key, data, settings.RECIPE_RESPONSE_CACHE_TTL)
+    return set_etag(render(view, data), etag)
+
+
+async def recipe_validators(pk=None):
+    recipes = Recipe.objects.order_by()
+    if pk is None:
+        validators = await recipes.aaggregate(
+            Max("created_at"), Max("updated_at")
+        )
+        return validators.values()
+    validators = await recipes.filter(pk=pk).values_list(
+        "created_at", "updated_at"
+    ).afirst()
+    if validators is None:
+        raise Fallback
+    return validators
+
+
+def serialize(view, instance, many=False):
+    return view.get_serializer(instance, many=many).data
+
+
+def page_link(request, number, pages):
+    """Ссылки next/previous как у PageNumberPagination."""
+    if not 1 <= number <= pages:
+        return None
+    url = request.build_absolute_uri()
+    if number == 1:
+        return remove_query_param(url, "page")
+    return replace_query_param(url, "page", number)
+
+
+def catalog_response(view, version, get_data):
+    etag = quote_etag(make_etag(view.request, version))
+    response = not_modified(view.request, etag)
+    if response is None:
+        response = render(view, get_data())
+    return set_etag(response, etag)
+
+
+@async_read(RecipesViewSet, "recipes", LIST_ACTIONS)
+async def recipe_list(view):
+    request = view.request
+    if RecipeCursorPagination.cursor_query_param in request.query_params:
+        raise Fallback
+    etag = make_etag(
+        request, response_version(request), *await recipe_validators(),
+        per_user=True,
+    )
+
+    async def respond():
+        # фильтр тегов проверяет slug запросом к БД
+        queryset = await sync_to_async(view.filter_queryset)(
+            view.get_queryset()
+        )
+        page_size = view.paginator.get_page_size(request)
+        if not page_size or page_size < 1:
+            # без пагинации (или с чужим пагинатором) — как у вьюсета
+            raise Fallback
+        count = await aget_recipe_count(queryset, request)
+        try:
+            number = int(request.query_params.get("page", 1))
+        except ValueError:
+            raise Fallback
+        pages = max(1, math.ceil(count / page_size))
+        if not 1 <= number <= pages:
+            raise Fallback
+        offset = (number - 1) * page_size
+        page = [
+            recipe async for recipe in queryset[offset:offset + page_size]
+        ]
+        return {
+            "count": count,
+            "next": page_link(request, number + 1, pages),
+            "previous": page_link(request, number - 1, pages),
+            "results": serialize(view, page, many=True),
+        }
+
+    return await conditional(view, etag, respond)
+
+
+@async_read(RecipesViewSet, "recipes", DETAIL_ACTIONS, detail=True)
+async def recipe_detail(view, pk):
+    request = view.request
+    if request.query_params:
+        raise Fallback
+    etag = make_etag(
+        request, response_version(), *await recipe_validators(pk),
+        per_user=True,
+    )
+
+    async def respond():
+        recipe = await view.get_queryset().filter(pk=pk).afirst()
+        if recipe is None:
+            raise Fallback
+        return serialize(view, recipe)
+
+    return await conditional(view, etag, respond)
+
+
+@async_read(TagViewSet, "tags", LIST_ACTIONS)
+async def tag_list(view):
+    catalog = await aget_catalog()
+    return catalog_response(
+        view,
+        catalog.version,
+        lambda: TagSerializer(catalog.tags.values(), many=True).data,
+    )
+
+
+@async_read(TagViewSet, "tags", DETAIL_ACTIONS, detail=True)
+async def tag_detail(view, pk):
+    catalog = await aget_catalog()
+    if pk not in catalog.tags:
+        raise Fallback
+    return catalog_response(
+        view, catalog.version, lambda: TagSerializer(catalog.tags[pk]).data
+    )
+
+
+@async_read(IngredientViewSet, "ingredients", {"get": "list"})
+async def ingredient_list(view):
+    catalog = await aget_catalog()
+    name = view.request.query_params.get(IngredientViewSet.search_param, "")
+
+    def get_data():
+        index = catalog.ingredient_index
+        if name.strip():
+            entries = index.search(name, settings.INGREDIENT_SEARCH_LIMIT)
+        else:
+            entries = index.entries
+        return [
+            {
+                "id": entry.id,
+                "name": entry.name,
+                "measurement_unit": entry.measurement_unit,
+            }
+            for entry in entries
+        ]
+
+    return catalog_response(view, catalog.version, get_data)
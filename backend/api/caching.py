@@ -0,0 +1,142 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.versioning import bump_version, get_version
+
+RESPONSE_VERSION_KEY = "recipes:response:version"
+
+# ?ordering=popular зависит от favorites_count, который меняется
+# UPDATE счётчика без сохранения рецепта
+POPULARITY_VERSION_KEY = "recipes:popularity:version"
+
+
+USER_STATE_VERSION_KEY = "recipes:user-state:version:{user_id}"
+
+
+def invalidate_recipe_responses():
+    """Сбрасывает закешированные ответы ленты и карточек рецептов."""
+    bump_version(RESPONSE_VERSION_KEY)
+
+
+def invalidate_popular_responses():
+    """Сбрасывает ответы ленты с сортировкой по избранному."""
+    bump_version(POPULARITY_VERSION_KEY)
+
+
+def invalidate_user_responses(user_id):
+    """Сбрасывает валидаторы ответов, зависящих от флагов пользователя."""
+    bump_version(USER_STATE_VERSION_KEY.format(user_id=user_id))
+
+
+def request_signature(request):
+    params = sorted(
+        (name, sorted(request.query_params.getlist(name)))
+        for name in request.query_params
+    )
+    return "|".join((request.get_host(), request.path, repr(params)))
+
+
+def response_cache_key(request):
+    raw = "|".join((
+        str(response_version(request)),
+        request_signature(request),
+    ))
+    return "recipes:response:" + hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def response_version(request=None):
+    """Версия ответов; для ?ordering=popular — вместе с версией рейтинга."""
+    version = get_version(RESPONSE_VERSION_KEY)
+    if request is not None and (
+        request.query_params.get("ordering") == "popular"
+    ):
+        return f"{version}.{get_version(POPULARITY_VERSION_KEY)}"
+    return version
+
+
+def make_etag(request, *parts, per_user=False):
+    """
+    ETag ответа: параметры запроса и переданные валидаторы.
+    С per_user добавляются пользователь и версия его флагов
+    (избранное, корзина, подписки).
+
+    Версии живут в кеше по умолчанию; если он у каждого процесса свой,
+    изменение в одном воркере не видно другим, поэтому ETag меняется
+    не реже чем раз в LOCAL_CACHE_TTL секунд.
+    """
+    if not settings.CACHE_SHARED:
+        parts += (int(time.time() // settings.LOCAL_CACHE_TTL),)
+    user = request.user
+    if per_user and user.is_authenticated:
+        parts += (
+            user.pk,
+            get_version(USER_STATE_VERSION_KEY.format(user_id=user.pk)),
+        )
+    raw = "|".join(map(str, (request_signature(request),) + parts))
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def conditional_get(view_method):
+    """
+    Поддержка If-None-Match: значение ETag даёт метод get_etag вьюсета,
+    и при совпадении ответ 304 отдаётся без выборки и сериализации.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view_method(self, request, *args, **kwargs)
+        etag = self.get_etag(request, *args, **kwargs)
+        if etag is None:
+            return view_method(self, request, *args, **kwargs)
+        etag = quote_etag(etag)
+        response = not_modified(request, etag)
+        if response is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        return set_etag(response, etag)
+
+    return wrapper
+
+
+def not_modified(request, etag):
+    """Ответ 304, если etag совпал с If-None-Match, иначе None."""
+    return get_conditional_response(request._request, etag=etag)
+
+
+def set_etag(response, etag):
+    response["ETag"] = etag
+    # ответ зависит от пользователя, общий кеш не должен их смешивать
+    patch_vary_headers(response, ("Authorization",))
+    return response
+
+
+def cache_anonymous_response(view_method):
+    """
+    Кеширует данные успешного ответа для анонимных GET-запросов:
+    для них выдача одинакова для всех пользователей.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.user.is_authenticated or request.method != "GET":
+            return view_method(self, request, *args, **kwargs)
+        key = response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.RECIPE_RESPONSE_CACHE_TTL)
+        return response
+
+    return wrapper
@@ -0,0 +1,116 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+from recipes.models import Recipe
+from recipes.versioning import bump_version, get_version
+
+COUNT_VERSION_KEY = "recipes:count:version"
+USER_COUNT_VERSION_KEY = "recipes:count:version:user:{}"
+# параметры, не влияющие на число рецептов в выдаче
+PAGINATION_PARAMS = ("page", "limit", "cursor", "ordering")
+# фильтры, результат которых зависит от текущего пользователя
+USER_FLAG_PARAMS = ("is_favorited", "is_in_shopping_cart")
+BOOLEAN_VALUES = {"true": "1", "1": "1", "false": "0", "0": "0"}
+
+
+def invalidate_recipe_counts():
+    """Сбрасывает все закешированные количества рецептов."""
+    bump_version(COUNT_VERSION_KEY)
+
+
+def invalidate_user_recipe_counts(user_id):
+    """Сбрасывает количества по избранному и корзине пользователя."""
+    bump_version(USER_COUNT_VERSION_KEY.format(user_id))
+
+
+def normalize_filters(query_params):
+    """Приводит параметры фильтрации к каноническому виду."""
+    normalized = []
+    for name in sorted(query_params):
+        if name in PAGINATION_PARAMS:
+            continue
+        values = sorted({
+            BOOLEAN_VALUES.get(value.lower(), value)
+            for value in query_params.getlist(name)
+            if value != ""
+        })
+        if values:
+            normalized.append((name, tuple(values)))
+    return tuple(normalized)
+
+
+def recipe_count_key(request):
+    filters = normalize_filters(request.query_params)
+    parts = [str(get_version(COUNT_VERSION_KEY)), repr(filters)]
+    user = request.user
+    if user.is_authenticated and any(
+        name in USER_FLAG_PARAMS for name, _ in filters
+    ):
+        parts += [
+            str(user.id),
+            str(get_version(USER_COUNT_VERSION_KEY.format(user.id))),
+        ]
+    digest = hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+    return f"recipes:count:{digest}", not filters
+
+
+def estimated_recipe_count():
+    """
+    Оценка числа строк из статистики планировщика PostgreSQL.
+    Возвращает None, если оценка недоступна или таблица невелика.
+    """
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [Recipe._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if not row or row[0] < settings.RECIPE_COUNT_ESTIMATE_THRESHOLD:
+        return None
+    return row[0]
+
+
+def get_recipe_count(queryset, request):
+    """Количество рецептов в выдаче с кешированием по набору фильтров."""
+    key, unfiltered = recipe_count_key(request)
+    count = cache.get(key)
+    if count is None:
+        if unfiltered:
+            count = estimated_recipe_count()
+        if count is None:
+            count = queryset.count()
+        cache.set(key, count, settings.RECIPE_COUNT_CACHE_TTL)
+    return count
+
+
+async def aget_recipe_count(queryset, request):
+    """get_recipe_count для асинхронных вьюх."""
+    key, unfiltered = recipe_count_key(request)
+    count = await cache.aget(key)
+    if count is None:
+        if unfiltered:
+            count = await sync_to_async(estimated_recipe_count)()
+        if count is None:
+            count = await queryset.acount()
+        await cache.aset(key, count, settings.RECIPE_COUNT_CACHE_TTL)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, берущий общее количество из get_recipe_count."""
+
+    def __init__(self, object_list, per_page, request=None, **kwargs):
+        self.request = request
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        return get_recipe_count(self.object_list, self.request)
@@ -1,12 +1,20 @@
 from django_filters import rest_framework as django_filters
-from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe, Tag
 
+ORDERINGS = {
+    "popular": ("-favorites_count", "-created_at", "-id"),
+    "trending": ("-trending_score", "-created_at", "-id"),
+}
+
 
 class RecipeQueryFilter(django_filters.FilterSet):
-    """Фильтры для рецептов: по автору, тэгам, избранному и корзине."""
+    """
+    Фильтры рецептов: автор, тэги, избранное, корзина и поиск,
+    а также сортировка ?ordering=popular|trending.
+    """
 
+    search = django_filters.CharFilter(method="filter_search")
     is_favorited = django_filters.BooleanFilter()
     is_in_shopping_cart = django_filters.BooleanFilter()
     author = django_filters.NumberFilter(field_name="author")
@@ -15,13 +23,24 @@ class RecipeQueryFilter(django_filters.FilterSet):
         field_name="tags__slug",
         to_field_name="slug",
     )
+    # объявлен последним, чтобы сортировка применялась после поиска
+    ordering = django_filters.ChoiceFilter(
+        choices=(
+            ("popular", "Больше всего в избранном"),
+            ("trending", "Популярные сейчас"),
+        ),
+        method="filter_ordering",
+    )
 
     class Meta:
         model = Recipe
         fields = ["author", "tags", "is_favorited", "is_in_shopping_cart"]
 
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return queryset.search(value)
 
-class IngredientNameSearch(SearchFilter):
-    """Поиск ингредиентов по имени через параметр ?name=""."""
-
-    search_param = "name"
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*ORDERINGS[value])
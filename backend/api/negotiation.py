@@ -0,0 +1,14 @@
+from rest_framework.negotiation import BaseContentNegotiation
+
+
+class IgnoreFormatContentNegotiation(BaseContentNegotiation):
+    """
+    Всегда первый рендерер, без учёта ?format= и Accept: для действий,
+    где ?format= означает формат выгружаемого файла.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
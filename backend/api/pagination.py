@@ -1,8 +1,22 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+from datetime import datetime
+from functools import partial
 
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-class RecipePagination(PageNumberPagination):
-    """Пагинация для рецептов на главной странице."""
+from api.counting import CachedCountPaginator
+from recipes import feeds
+
+
+class LimitParamMixin:
+    """
+    Размер страницы из параметра ?limit= с ограничением сверху;
+    нечисловой и меньший 1 заменяется на default_limit.
+    """
 
     page_size_query_param = "limit"
     max_page_size = 100
@@ -10,9 +24,127 @@ class RecipePagination(PageNumberPagination):
 
     def get_page_size(self, request):
         limit = request.query_params.get(self.page_size_query_param)
-        if limit:
-            try:
-                return min(int(limit), self.max_page_size)
-            except (TypeError, ValueError):
-                pass
-        return self.default_limit
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return self.default_limit
+        if limit < 1:
+            return self.default_limit
+        return min(limit, self.max_page_size)
+
+
+class RecipePagination(LimitParamMixin, PageNumberPagination):
+    """Пагинация для рецептов на главной странице."""
+
+
+class RecipeFeedPagination(RecipePagination):
+    """
+    Пагинация ленты рецептов с кешированным общим количеством.
+    Для ленты без фильтров может использоваться оценка планировщика.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            CachedCountPaginator, request=request
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+
+class RecipeCursorPagination(LimitParamMixin, BasePagination):
+    """
+    Keyset-пагинация ленты по (created_at, id) без COUNT(*) и OFFSET.
+    Включается параметром ?cursor= (пустое значение — первая страница).
+    Курсор строится по дате, поэтому с сортировкой и поиском несовместим.
+    """
+
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+    # параметры, задающие собственный порядок выдачи
+    ordering_params = ("ordering", "search")
+    invalid_cursor_message = "Некорректный курсор."
+    conflicting_params_message = "Параметр cursor нельзя сочетать с {}."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        conflicting = [
+            param for param in self.ordering_params
+            if request.query_params.get(param, "").strip()
+        ]
+        if conflicting:
+            raise ValidationError({
+                self.cursor_query_param: self.conflicting_params_message.format(
+                    ", ".join(conflicting)
+                )
+            })
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at)
+                | Q(created_at=created_at, id__lt=pk)
+            )
+
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        # страница ленты может оказаться пустой, если её рецепты удалили
+        if not (self.has_next and self.page):
+            return None
+        last = self.page[-1]
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(last.created_at, last.id),
+        )
+
+    def encode_cursor(self, created_at, pk):
+        raw = f"{created_at.isoformat()}|{pk}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii"))
+            created_at, pk = raw.decode("utf-8").split("|")
+            return datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class FeedTimelinePagination(RecipeCursorPagination):
+    """
+    Keyset-пагинация ленты подписок: id страницы берутся из ленты
+    пользователя (recipes.feeds), рецепты — переданной выборкой.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        ids = feeds.timeline(
+            request.user, page_size + 1, self.decode_cursor(request)
+        )
+        self.has_next = len(ids) > page_size
+        recipes = queryset.in_bulk(ids[:page_size])
+        self.page = [recipes[pk] for pk in ids[:page_size] if pk in recipes]
+        return self.page
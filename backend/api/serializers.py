@@ -1,5 +1,4 @@
-import base64
-from django.core.files.base import ContentFile
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.db import transaction, IntegrityError
 from django.shortcuts import get_object_or_404
@@ -9,7 +8,13 @@ from djoser.serializers import (
 )
 from rest_framework import serializers
 
+from api.uploads import InvalidDataURL, UploadTooLarge, decode_data_url
+from recipes import cart_totals
+from recipes.catalog import resolve_ids
+from recipes.images import InvalidImage, check_image
+from recipes.tasks import IMAGE_SPECS, process_image
 from recipes.models import (
+    ImageStatus,
     Ingredient,
     Recipe,
     RecipeIngredientAmount,
@@ -21,22 +26,89 @@ from users.models import User, Subscription
 
 
 class Base64ImageField(serializers.ImageField):
-    """Поле для приёма изображений в формате base64."""
+    """
+    Поле для приёма изображений в формате base64.
+    Здесь проверяются только формат и размеры; сжатие и миниатюры
+    делает фоновая задача process_image.
+    """
+
+    def __init__(self, *args, max_upload_size=None, formats=None, **kwargs):
+        self.max_upload_size = max_upload_size
+        self.formats = formats
+        super().__init__(*args, **kwargs)
 
     def to_internal_value(self, data):
+        max_size = self.max_upload_size or settings.IMAGE_MAX_UPLOAD_SIZE
         if isinstance(data, str) and data.startswith("data:image"):
             try:
-                fmt, imgstr = data.split(";base64,")
-            except ValueError:
+                data = decode_data_url(data, max_size)
+            except UploadTooLarge:
+                self.fail_too_large(max_size)
+            except InvalidDataURL:
                 raise serializers.ValidationError(
                     "Некорректный формат base64"
                 )
-            ext = fmt.split("/")[-1]
-            data = ContentFile(
-                base64.b64decode(imgstr),
-                name=f"image.{ext}"
+        image = super().to_internal_value(data)
+        if image.size > max_size:
+            self.fail_too_large(max_size)
+        if self.formats and image.image.format not in self.formats:
+            raise serializers.ValidationError(
+                f"Допустимы только файлы {' и '.join(self.formats)}"
+            )
+        try:
+            check_image(image)
+        except InvalidImage as error:
+            raise serializers.ValidationError(str(error))
+        return image
+
+    def fail_too_large(self, max_size):
+        raise serializers.ValidationError(
+            "Размер файла не должен превышать "
+            f"{max_size // (1024 * 1024)} МБ"
+        )
+
+
+class ThumbnailField(serializers.ImageField):
+    """Миниатюра; у записей, где её ещё нет, отдаётся оригинал."""
+
+    def __init__(self, original, **kwargs):
+        self.original = original
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return (
+            super().get_attribute(instance)
+            or getattr(instance, self.original)
+        )
+
+
+class ImageProcessingMixin:
+    """
+    Сохраняет загруженное изображение как есть и ставит в очередь его
+    обработку; до её завершения статус pending, а вместо миниатюры
+    отдаётся оригинал.
+    """
+
+    def save(self, **kwargs):
+        model = self.Meta.model._meta.label_lower
+        spec = IMAGE_SPECS[model]
+        image = self.validated_data.get(spec.source)
+        if spec.source in self.validated_data:
+            kwargs[spec.thumb] = ""
+            kwargs[spec.status] = (
+                ImageStatus.PENDING if image else ImageStatus.READY
+            )
+        instance = super().save(**kwargs)
+        if image:
+            # временный файл загрузки уже перенесён в хранилище
+            image.close()
+            process_image.delay(
+                model=model,
+                pk=instance.pk,
+                name=getattr(instance, spec.source).name,
             )
-        return super().to_internal_value(data)
+        return instance
 
 
 class RelationStatusSerializer(serializers.Serializer):
@@ -48,10 +120,8 @@ class IngredientAmountInputSerializer(serializers.ModelSerializer):
     редактировании рецепта.
     """
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source="ingredient"
-    )
+    # id проверяются разом в RecipeCreateUpdateSerializer.validate_ingredients
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(
         validators=[MinValueValidator(
             1,
@@ -67,6 +137,8 @@ class IngredientAmountInputSerializer(serializers.ModelSerializer):
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Сокращённый вывод рецепта (для избранного, корзины и т.п.)."""
 
+    image = ThumbnailField("image", source="image_thumb")
+
     class Meta:
         model = Recipe
         fields = ("id", "name", "image", "cooking_time")
@@ -97,25 +169,23 @@ class TagSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class UserSerializer(DjoserUserSerializer):
+class UserSerializer(ImageProcessingMixin, DjoserUserSerializer):
     """Пользователь с признаком подписки и аватаром."""
 
     is_subscribed = serializers.SerializerMethodField()
-    avatar = Base64ImageField(required=False, allow_null=True)
-
-    def validate_avatar(self, value):
-        if value:
-            if getattr(value, "size", 0) > 5 * 1024 * 1024:
-                raise serializers.ValidationError(
-                    "Размер файла не должен превышать 5 МБ"
-                )
-            if not value.name.lower().endswith((".jpg", ".jpeg", ".png")):
-                raise serializers.ValidationError(
-                    "Допустимы только файлы JPG и PNG"
-                )
-        return value
+    avatar = Base64ImageField(
+        required=False,
+        allow_null=True,
+        max_upload_size=5 * 1024 * 1024,
+        formats=("JPEG", "PNG"),
+    )
+    avatar_thumb = ThumbnailField("avatar")
 
     def get_is_subscribed(self, obj):
+        # в ленте рецептов признак уже посчитан аннотацией
+        annotated = getattr(obj, "is_subscribed", None)
+        if annotated is not None:
+            return annotated
         request = self.context.get("request")
         return (
             request
@@ -133,6 +203,8 @@ class UserSerializer(DjoserUserSerializer):
             "last_name",
             "is_subscribed",
             "avatar",
+            "avatar_thumb",
+            "avatar_status",
         )
 
 
@@ -160,6 +232,7 @@ class RecipeDetailSerializer(serializers.ModelSerializer):
         read_only=True
     )
     image = Base64ImageField(required=False)
+    image_thumb = ThumbnailField("image")
     is_favorited = serializers.BooleanField(read_only=True, default=False)
     is_in_shopping_cart = serializers.BooleanField(
         read_only=True,
@@ -177,10 +250,18 @@ class RecipeDetailSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_thumb",
+            "image_status",
             "text",
             "cooking_time",
         )
 
+    def to_representation(self, instance):
+        is_subscribed = getattr(instance, "is_author_subscribed", None)
+        if is_subscribed is not None:
+            instance.author.is_subscribed = is_subscribed
+        return super().to_representation(instance)
+
 
 class AuthorMiniSerializer(serializers.ModelSerializer):
     """Короткая карточка автора для вложенного использования."""
@@ -190,14 +271,13 @@ class AuthorMiniSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
+class RecipeCreateUpdateSerializer(
+    ImageProcessingMixin, serializers.ModelSerializer
+):
     """Сериализатор для создания и редактирования рецептов."""
 
     author = AuthorMiniSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     ingredients = IngredientAmountInputSerializer(many=True)
     image = Base64ImageField()
     cooking_time = serializers.IntegerField(
@@ -242,6 +322,31 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             ]
         )
 
+    @staticmethod
+    def _resolve(section, ids, message):
+        found = resolve_ids(section, ids)
+        missing = sorted(set(ids) - found.keys())
+        if missing:
+            raise serializers.ValidationError(
+                f"{message}: {', '.join(map(str, missing))}."
+            )
+        return found
+
+    def validate_tags(self, value):
+        found = self._resolve("tags", value, "Теги не найдены")
+        return [found[tag_id] for tag_id in value]
+
+    def validate_ingredients(self, value):
+        found = self._resolve(
+            "ingredients",
+            [item["id"] for item in value],
+            "Ингредиенты не найдены",
+        )
+        return [
+            {"ingredient": found[item["id"]], "amount": item["amount"]}
+            for item in value
+        ]
+
     def validate(self, attrs):
         tags = attrs.get("tags")
         ingredients = attrs.get("ingredients")
@@ -252,7 +357,7 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     {"tags": "Укажите хотя бы один тег."}
                 )
-            tag_ids = [t.id if hasattr(t, "id") else int(t) for t in tags]
+            tag_ids = [tag.id for tag in tags]
             if len(tag_ids) != len(set(tag_ids)):
                 raise serializers.ValidationError(
                     {"tags": "Теги не должны повторяться."}
@@ -284,13 +389,56 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         self._save_ingredients(recipe, ingredients)
         return recipe
 
+    def _sync_tags(self, recipe, tags):
+        current_ids = set(recipe.tags.values_list("id", flat=True))
+        if current_ids != {tag.id for tag in tags}:
+            recipe.tags.set(tags)
+
+    def _sync_ingredients(self, recipe, ingredients_data):
+        """Меняет только отличающиеся строки RecipeIngredientAmount."""
+        existing = {
+            row.ingredient_id: row
+            for row in recipe.recipeingredientamount_set.all()
+        }
+        wanted = {ing["ingredient"].id: ing for ing in ingredients_data}
+
+        removed_ids = existing.keys() - wanted.keys()
+        added = [
+            ing for ing_id, ing in wanted.items() if ing_id not in existing
+        ]
+        changed = []
+        for ing_id, row in existing.items():
+            if ing_id in wanted and row.amount != wanted[ing_id]["amount"]:
+                row.amount = wanted[ing_id]["amount"]
+                changed.append(row)
+        if not (removed_ids or added or changed):
+            return
+
+        # удалённые строки пересчитывает сигнал post_delete, а
+        # bulk_update и bulk_create сигналов не шлют
+        if removed_ids:
+            RecipeIngredientAmount.objects.filter(
+                recipe=recipe, ingredient_id__in=removed_ids
+            ).delete()
+        if changed:
+            RecipeIngredientAmount.objects.bulk_update(changed, ["amount"])
+        if added:
+            self._save_ingredients(recipe, added)
+        if changed or added:
+            cart_totals.refresh(
+                recipe.id,
+                [row.ingredient_id for row in changed]
+                + [ing["ingredient"].id for ing in added],
+            )
+
     @transaction.atomic
     def update(self, instance, validated_data):
-        tags = validated_data.pop("tags", [])
-        ingredients = validated_data.pop("ingredients", [])
-        instance.tags.set(tags)
-        instance.ingredients.clear()
-        self._save_ingredients(instance, ingredients)
+        tags = validated_data.pop("tags", None)
+        ingredients = validated_data.pop("ingredients", None)
+        if tags is not None:
+            self._sync_tags(instance, tags)
+        if ingredients is not None:
+            self._sync_ingredients(instance, ingredients)
 
         return super().update(instance, validated_data)
 
@@ -304,6 +452,8 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
 class FavoriteSerializer(serializers.ModelSerializer):
     """Карточка рецепта для избранного/корзины."""
 
+    image = ThumbnailField("image", source="image_thumb")
+
     class Meta:
         model = Recipe
         fields = ("id", "name", "image", "cooking_time")
@@ -388,6 +538,12 @@ class SubscriptionSerializer(UserSerializer):
         )
 
 
+class SubscriptionParamsSerializer(serializers.Serializer):
+    """Параметры запроса подписок."""
+
+    recipes_limit = serializers.IntegerField(min_value=1, required=False)
+
+
 class AddSubscriptionSerializer(serializers.Serializer):
     """Валидация при подписке/отписке от пользователя."""
 
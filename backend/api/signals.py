@@ -0,0 +1,209 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from api.caching import (
+    invalidate_popular_responses,
+    invalidate_recipe_responses,
+    invalidate_user_responses,
+)
+from api.counting import (
+    invalidate_recipe_counts,
+    invalidate_user_recipe_counts,
+)
+from recipes import cart_totals, counters, feeds
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredientAmount,
+    ShoppingCart,
+    Tag,
+)
+from recipes.tasks import fan_out_recipe
+from recipes.versioning import invalidate_catalog
+from users.models import Subscription
+
+User = get_user_model()
+
+# Кеши сбрасываются после коммита: иначе параллельный запрос успеет
+# закешировать ещё не закоммиченное состояние под новой версией.
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(invalidate_recipe_counts)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    if created:
+        fan_out_recipe.delay(recipe_id=instance.pk)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    if created:
+        feeds.follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    feeds.unfollow(instance.user_id, instance.author_id)
+
+
+# Итоги списков покупок меняются в той же транзакции, что и корзина или
+# состав рецепта, — откуда бы ни пришло изменение (API, админка, ORM).
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_item_added(sender, instance, created, **kwargs):
+    if created:
+        cart_totals.add_recipe(instance.recipe_id, instance.user_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def cart_item_removing(sender, instance, **kwargs):
+    # до удаления: при каскаде от рецепта его ингредиенты ещё на месте
+    cart_totals.remove_recipe(instance.recipe_id, instance.user_id)
+
+
+@receiver(pre_save, sender=RecipeIngredientAmount)
+def ingredient_amount_saving(sender, instance, **kwargs):
+    # прежний ингредиент строки: его итог тоже нужно пересчитать
+    instance.previous_ingredient_id = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("ingredient_id", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=RecipeIngredientAmount)
+def ingredient_amount_saved(sender, instance, **kwargs):
+    ingredient_ids = {instance.ingredient_id, instance.previous_ingredient_id}
+    cart_totals.refresh(instance.recipe_id, ingredient_ids - {None})
+
+
+@receiver(post_delete, sender=RecipeIngredientAmount)
+def ingredient_amount_deleted(sender, instance, **kwargs):
+    cart_totals.refresh(instance.recipe_id, [instance.ingredient_id])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_recipe_counts)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        transaction.on_commit(invalidate_recipe_counts)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def user_flags_changed(sender, instance, **kwargs):
+    transaction.on_commit(
+        partial(invalidate_user_recipe_counts, instance.user_id)
+    )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Subscription)
+def user_state_changed(sender, instance, **kwargs):
+    transaction.on_commit(
+        partial(invalidate_user_responses, instance.user_id)
+    )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorites_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_popular_responses)
+
+
+# Счётчики меняются в той же транзакции, что и связь. Сигналы
+# срабатывают и при каскадном удалении (например, пользователя).
+
+
+def _change_counters(instance, delta, counted):
+    for model, field, fk in counted:
+        counters.change(model, getattr(instance, f"{fk}_id"), field, delta)
+
+
+COUNTED_BY = {
+    Favorite: ((Recipe, "favorites_count", "recipe"),),
+    ShoppingCart: ((Recipe, "cart_count", "recipe"),),
+    Recipe: ((User, "recipes_count", "author"),),
+    Subscription: (
+        (User, "followers_count", "author"),
+        (User, "following_count", "user"),
+    ),
+}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Subscription)
+def counted_relation_created(sender, instance, created, **kwargs):
+    if created:
+        _change_counters(instance, 1, COUNTED_BY[sender])
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Subscription)
+def counted_relation_deleted(sender, instance, **kwargs):
+    _change_counters(instance, -1, COUNTED_BY[sender])
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def catalog_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_recipe_responses)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredientAmount)
+@receiver(post_delete, sender=RecipeIngredientAmount)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_data_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_recipe_responses)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    # вход пользователя обновляет только last_login — на ленту не влияет
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    transaction.on_commit(invalidate_recipe_responses)
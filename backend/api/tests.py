@@ -0,0 +1,452 @@
+import base64
+import json
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.serializers import Base64ImageField, RecipeCreateUpdateSerializer
+from api.uploads import InvalidDataURL, UploadTooLarge, decode_data_url
+from recipes.catalog import get_catalog
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredientAmount,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscription, User
+
+
+def create_user(number):
+    return User.objects.create_user(
+        email=f"user{number}@example.com",
+        username=f"user{number}",
+        first_name="Пользователь",
+        last_name=str(number),
+        password="test-password",
+    )
+
+
+class RecipeFeedQueryCountTest(TestCase):
+    """Лента рецептов читается одним числом запросов при любом limit."""
+
+    # рецептов больше наибольшего limit, чтобы страница была полной
+    RECIPES = 110
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = [create_user(number) for number in range(3)]
+        cls.reader = create_user(99)
+        tags = Tag.objects.bulk_create(
+            Tag(name=f"Тег {number}", slug=f"tag{number}")
+            for number in range(3)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"ингредиент {number}", measurement_unit="г")
+            for number in range(5)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=authors[number % len(authors)],
+                name=f"Рецепт {number}",
+                text="Описание",
+                image="recipe_images/temp.jpeg",
+                cooking_time=10,
+            )
+            for number in range(cls.RECIPES)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe in recipes
+            for tag in tags[:2]
+        )
+        RecipeIngredientAmount.objects.bulk_create(
+            RecipeIngredientAmount(
+                recipe=recipe, ingredient=ingredient, amount=100
+            )
+            for recipe in recipes
+            for ingredient in ingredients[:3]
+        )
+        Favorite.objects.bulk_create(
+            Favorite(user=cls.reader, recipe=recipe) for recipe in recipes[::2]
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=cls.reader, recipe=recipe)
+            for recipe in recipes[::3]
+        )
+        Subscription.objects.create(user=cls.reader, author=authors[0])
+        cls.token = Token.objects.create(user=cls.reader)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assert_feed_queries(self, limit, expected):
+        # кеши ответов, количества и ETag общие для запросов; снимок
+        # справочников собирается заранее, чтобы не попасть в подсчёт
+        cache.clear()
+        get_catalog()
+        with self.assertNumQueries(expected):
+            response = self.client.get("/api/recipes/", {"limit": limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), limit)
+
+    def test_anonymous_feed(self):
+        for limit in (6, 100):
+            with self.subTest(limit=limit):
+                self.assert_feed_queries(limit, 6)
+
+    def test_authenticated_feed(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+        for limit in (6, 100):
+            with self.subTest(limit=limit):
+                self.assert_feed_queries(limit, 7)
+
+
+class RecipeUpdateWritesTest(TestCase):
+    """PATCH рецепта пишет в БД только то, что изменилось."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f"Тег {number}", slug=f"tag{number}")
+            for number in range(2)
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"ингредиент {number}", measurement_unit="г")
+            for number in range(4)
+        )
+
+    def setUp(self):
+        cache.clear()
+        get_catalog()
+        self.recipe = Recipe.objects.create(
+            author=self.author,
+            name="Рецепт",
+            text="Описание",
+            image="recipe_images/temp.jpeg",
+            cooking_time=10,
+        )
+        self.recipe.tags.set(self.tags[:1])
+        RecipeIngredientAmount.objects.bulk_create(
+            RecipeIngredientAmount(
+                recipe=self.recipe, ingredient=ingredient, amount=100
+            )
+            for ingredient in self.ingredients[:2]
+        )
+
+    def payload(self, amounts):
+        return {
+            "name": "Рецепт",
+            "text": "Описание",
+            "cooking_time": 10,
+            "tags": [self.tags[0].id],
+            "ingredients": [
+                {"id": self.ingredients[number].id, "amount": amount}
+                for number, amount in amounts.items()
+            ],
+        }
+
+    def update_writes(self, amounts):
+        """Запросы на запись, выполненные при сохранении PATCH."""
+        request = APIRequestFactory().patch("/")
+        request.user = self.author
+        serializer = RecipeCreateUpdateSerializer(
+            self.recipe,
+            data=self.payload(amounts),
+            partial=True,
+            context={"request": request},
+        )
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as captured:
+            serializer.save()
+        return [
+            query["sql"]
+            for query in captured.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+
+    def amounts(self):
+        return dict(
+            self.recipe.recipeingredientamount_set.values_list(
+                "ingredient_id", "amount"
+            )
+        )
+
+    def test_unchanged_payload_updates_only_recipe(self):
+        writes = self.update_writes({0: 100, 1: 100})
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith('UPDATE "recipes_recipe" '))
+
+    def test_ingredient_diff(self):
+        cases = (
+            ("добавление", {0: 100, 1: 100, 2: 50}, "INSERT"),
+            ("изменение", {0: 100, 1: 200}, "UPDATE"),
+            ("удаление", {0: 100}, "DELETE"),
+        )
+        for title, amounts, statement in cases:
+            with self.subTest(title):
+                writes = self.update_writes(amounts)
+                ingredient_writes = [
+                    sql for sql in writes
+                    if '"recipes_recipeingredientamount"' in sql
+                ]
+                self.assertEqual(len(ingredient_writes), 1, writes)
+                self.assertTrue(ingredient_writes[0].startswith(statement))
+                self.assertEqual(
+                    self.amounts(),
+                    {
+                        self.ingredients[number].id: amount
+                        for number, amount in amounts.items()
+                    },
+                )
+                # следующий случай начинает с исходного состава
+                self.update_writes({0: 100, 1: 100})
+
+
+class PopularOrderingCacheTest(TestCase):
+    """Ответы ?ordering=popular сбрасываются при изменении избранного."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user(0)
+        cls.recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=cls.reader,
+                name=f"Рецепт {number}",
+                text="Описание",
+                image="recipe_images/temp.jpeg",
+                cooking_time=10,
+            )
+            for number in range(2)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get_popular(self, **headers):
+        return self.client.get(
+            "/api/recipes/", {"ordering": "popular"}, headers=headers
+        )
+
+    def test_favorite_changes_popular_response(self):
+        response = self.get_popular()
+        first = response.data["results"][0]["id"]
+        etag = response["ETag"]
+        last = next(recipe for recipe in self.recipes if recipe.id != first)
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.reader, recipe=last)
+
+        response = self.get_popular(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["id"], last.id)
+
+
+class CursorPaginationParamsTest(TestCase):
+    """Курсор по дате не сочетается с сортировкой и поиском."""
+
+    def test_cursor_with_ordering_or_search(self):
+        client = APIClient()
+        for params in ({"ordering": "popular"}, {"search": "суп"}):
+            with self.subTest(params=params):
+                response = client.get(
+                    "/api/recipes/", {"cursor": "", **params}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("cursor", response.data)
+
+    def test_cursor_alone(self):
+        response = APIClient().get("/api/recipes/", {"cursor": ""})
+        self.assertEqual(response.status_code, 200)
+
+
+class LocalCacheEtagTest(TestCase):
+    """С кешем процесса ETag живёт не дольше LOCAL_CACHE_TTL."""
+
+    def setUp(self):
+        cache.clear()
+
+    def etag(self, now):
+        with mock.patch("api.caching.time.time", return_value=now):
+            return APIClient().get("/api/recipes/")["ETag"]
+
+    @override_settings(CACHE_SHARED=False, LOCAL_CACHE_TTL=5)
+    def test_local_cache(self):
+        self.assertEqual(self.etag(1000), self.etag(1004))
+        self.assertNotEqual(self.etag(1000), self.etag(1005))
+
+    @override_settings(CACHE_SHARED=True)
+    def test_shared_cache(self):
+        self.assertEqual(self.etag(1000), self.etag(5000))
+
+
+class IngredientSearchTest(TestCase):
+    """Поиск ингредиентов видит изменения справочника сразу."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, name):
+        response = self.client.get("/api/ingredients/", {"name": name})
+        self.assertEqual(response.status_code, 200)
+        return [ingredient["name"] for ingredient in response.data]
+
+    def test_changes_invalidate_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            flour = Ingredient.objects.create(
+                name="мука пшеничная", measurement_unit="г"
+            )
+        self.assertEqual(self.search("мук"), ["мука пшеничная"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name="мука", measurement_unit="г")
+            flour.name = "мука ржаная"
+            flour.save()
+        self.assertEqual(self.search("мук"), ["мука", "мука ржаная"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flour.delete()
+        self.assertEqual(self.search("мук"), ["мука"])
+
+
+def data_url(image_format="PNG", subtype="png"):
+    buffer = BytesIO()
+    Image.new("RGB", (20, 20), "red").save(buffer, image_format)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/{subtype};base64,{encoded}", buffer.getvalue()
+
+
+class DataURLDecoderTest(TestCase):
+    """Декодирование data URL и проверки Base64ImageField."""
+
+    def test_decode(self):
+        url, content = data_url()
+        self.assertEqual(decode_data_url(url, len(content)).read(), content)
+
+    def test_line_breaks(self):
+        url, content = data_url()
+        header, encoded = url.split(",", 1)
+        wrapped = "\r\n".join(
+            encoded[offset:offset + 76]
+            for offset in range(0, len(encoded), 76)
+        )
+        upload = decode_data_url(f"{header},{wrapped}\n", len(content))
+        self.assertEqual(upload.read(), content)
+
+    def test_oversize(self):
+        url, content = data_url()
+        with self.assertRaises(UploadTooLarge) as raised:
+            decode_data_url(url, len(content) - 1)
+        self.assertEqual(raised.exception.size, len(content))
+
+    def test_bad_padding(self):
+        url, _ = data_url()
+        for broken in (url[:-1], url.rstrip("=") + "A=A="):
+            with self.subTest(broken=broken[-4:]):
+                with self.assertRaises(InvalidDataURL):
+                    decode_data_url(broken, 10 ** 6)
+
+    def test_bad_header(self):
+        url, _ = data_url()
+        for broken in (
+            url.replace("data:image/png", "data:text/plain"),
+            url.replace("image/png", "image/../png"),
+            url.replace(";base64,", ","),
+        ):
+            with self.subTest(broken=broken[:24]):
+                with self.assertRaises(InvalidDataURL):
+                    decode_data_url(broken, 10 ** 6)
+
+    def assert_field_invalid(self, url, **options):
+        class ImageSerializer(serializers.Serializer):
+            image = Base64ImageField(**options)
+
+        serializer = ImageSerializer(data={"image": url})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("image", serializer.errors)
+
+    def test_field_wrong_type(self):
+        gif, _ = data_url("GIF", "gif")
+        text = "data:image/png;base64," + base64.b64encode(
+            b"not an image"
+        ).decode()
+        for url in (gif, text):
+            with self.subTest(url=url[:16]):
+                self.assert_field_invalid(url, formats=("JPEG", "PNG"))
+
+    def test_field_oversize(self):
+        url, content = data_url()
+        self.assert_field_invalid(url, max_upload_size=len(content) - 1)
+
+
+class ShoppingListUnitsTest(TestCase):
+    """Список покупок складывает совместимые единицы в базовой."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        recipes = [
+            Recipe.objects.create(
+                author=cls.user,
+                name=f"Рецепт {number}",
+                text="Описание",
+                image="recipe_images/temp.jpeg",
+                cooking_time=10,
+            )
+            for number in range(2)
+        ]
+        rows = (
+            (recipes[0], "мука", "г", 500),
+            (recipes[1], "мука", "кг", 2),
+            (recipes[0], "молоко", "л", 1),
+            (recipes[1], "молоко", "мл", 200),
+            (recipes[0], "сахар", "ст. л.", 1),
+            (recipes[1], "сахар", "ч. л.", 2),
+            (recipes[0], "соль", "г", 5),
+            (recipes[1], "соль", "щепотка", 1),
+            (recipes[0], "яйца", "", 3),
+        )
+        for recipe, name, unit, amount in rows:
+            ingredient, _ = Ingredient.objects.get_or_create(
+                name=name, measurement_unit=unit
+            )
+            RecipeIngredientAmount.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+        for recipe in recipes:
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def test_units_merged(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(
+            "/api/recipes/download_shopping_cart/", {"format": "json"}
+        )
+        self.assertEqual(response.status_code, 200)
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(
+            [
+                (row["name"], row["measurement_unit"], row["amount"])
+                for row in rows
+            ],
+            [
+                ("молоко", "мл", 1200),
+                ("мука", "г", 2500),
+                ("сахар", "ч. л.", 5),
+                # несовместимые единицы остаются отдельными строками
+                ("соль", "г", 5),
+                ("соль", "щепотка", 1),
+                ("яйца", "шт.", 3),
+            ],
+        )
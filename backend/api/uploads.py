@@ -0,0 +1,84 @@
+"""
+Декодирование изображений из data URL (data:image/png;base64,...).
+Размер результата считается по длине base64 до декодирования, так что
+слишком большой файл отклоняется без выделения памяти под него.
+Пробелы и переводы строк внутри base64 (как в MIME, по 76 символов в
+строке) пропускаются.
+Декодирование идёт частями: небольшие файлы собираются в памяти,
+крупные — во временном файле на диске, как у загрузок multipart.
+"""
+
+import base64
+import binascii
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile,
+    TemporaryUploadedFile,
+)
+
+DATA_URL_PREFIX = "data:image/"
+BASE64_MARKER = ";base64,"
+# кратно 4, чтобы каждая часть декодировалась независимо
+CHUNK_CHARS = 256 * 1024
+WHITESPACE = re.compile(r"\s+")
+
+
+class InvalidDataURL(ValueError):
+    """Строка не является корректным data URL с base64."""
+
+
+class UploadTooLarge(ValueError):
+    """Декодированный файл превышает допустимый размер."""
+
+    def __init__(self, size, limit):
+        super().__init__(size, limit)
+        self.size = size
+        self.limit = limit
+
+
+def decoded_size(data, start):
+    """Размер декодированных данных по длине base64 начиная со start."""
+    length = len(data) - start
+    if length % 4:
+        raise InvalidDataURL("Длина base64 не кратна 4")
+    padding = 0
+    if length:
+        padding = 2 if data.endswith("==") else int(data.endswith("="))
+    return length // 4 * 3 - padding
+
+
+def decode_data_url(data, max_size):
+    marker = data.find(BASE64_MARKER, 0, 100)
+    if not data.startswith(DATA_URL_PREFIX) or marker == -1:
+        raise InvalidDataURL("Нет заголовка data:image/...;base64,")
+    subtype = data[len(DATA_URL_PREFIX):marker]
+    if not subtype.isalnum():
+        raise InvalidDataURL("Некорректный тип изображения")
+    start = marker + len(BASE64_MARKER)
+    if WHITESPACE.search(data, start):
+        data = data[:start] + WHITESPACE.sub("", data[start:])
+    size = decoded_size(data, start)
+    if size > max_size:
+        raise UploadTooLarge(size, max_size)
+
+    name = f"image.{subtype.lower()}"
+    content_type = f"image/{subtype.lower()}"
+    if size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+        upload = TemporaryUploadedFile(name, content_type, size, None)
+    else:
+        upload = InMemoryUploadedFile(
+            BytesIO(), None, name, content_type, size, None
+        )
+    try:
+        for offset in range(start, len(data), CHUNK_CHARS):
+            upload.write(base64.b64decode(
+                data[offset:offset + CHUNK_CHARS], validate=True
+            ))
+    except binascii.Error as error:
+        upload.close()
+        raise InvalidDataURL(str(error)) from error
+    upload.seek(0)
+    return upload
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -19,3 +20,15 @@ router.register(r"users", UserProfileViewSet, basename="users")
 urlpatterns = [
     path("", include(router.urls)),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    from api import async_views
+
+    # под ASGI перехватывают GET, остальное передают вьюсетам роутера
+    urlpatterns = [
+        path("recipes/", async_views.recipe_list),
+        path("recipes/<int:pk>/", async_views.recipe_detail),
+        path("tags/", async_views.tag_list),
+        path("tags/<int:pk>/", async_views.tag_detail),
+        path("ingredients/", async_views.ingredient_list),
+    ] + urlpatterns
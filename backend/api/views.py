@@ -1,8 +1,7 @@
-import io
-
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Prefetch
-from django.http import FileResponse
+from django.db.models import Max, Prefetch, Value, prefetch_related_objects
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -11,30 +10,36 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from api.filters import IngredientNameSearch, RecipeQueryFilter
-from api.pagination import RecipePagination
+from api.caching import (
+    cache_anonymous_response,
+    conditional_get,
+    make_etag,
+    response_version,
+)
+from api.filters import RecipeQueryFilter
+from api.negotiation import IgnoreFormatContentNegotiation
+from api.pagination import (
+    FeedTimelinePagination,
+    RecipeCursorPagination,
+    RecipeFeedPagination,
+)
 from api.permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
 from api.serializers import (
+    AddSubscriptionSerializer,
     IngredientSerializer,
     RecipeCreateUpdateSerializer,
     RecipeDetailSerializer,
+    SubscriptionParamsSerializer,
     SubscriptionSerializer,
-    AddSubscriptionSerializer,
     TagSerializer,
 )
-from recipes.models import (
-    Favorite,
-    Ingredient,
-    Recipe,
-    ShoppingCart,
-    Tag
-)
-from recipes.shopping import build_shopping_list
+from recipes.catalog import get_catalog
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.shopping import UnsupportedFormat, stream_shopping_list
+from recipes.versioning import catalog_version
 from users.models import Subscription
-from .serializers import (
-    FavoriteAttachSerializer,
-    CartAttachSerializer
-)
+
+from .serializers import CartAttachSerializer, FavoriteAttachSerializer
 
 User = get_user_model()
 
@@ -49,7 +54,49 @@ class RecipesViewSet(ModelViewSet):
     permission_classes = (IsAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeQueryFilter
-    pagination_class = RecipePagination
+    pagination_class = RecipeFeedPagination
+
+    @property
+    def paginator(self):
+        # ?cursor= переключает ленту на keyset-пагинацию
+        if (
+            not hasattr(self, "_paginator")
+            and RecipeCursorPagination.cursor_query_param
+            in self.request.query_params
+        ):
+            self._paginator = RecipeCursorPagination()
+        return super().paginator
+
+    @conditional_get
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    @cache_anonymous_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_etag(self, request, pk=None, **kwargs):
+        # удаления и правки связанных данных меняют версию ответов,
+        # даты рецептов страхуют от вытеснения версии из кеша
+        recipes = Recipe.objects.order_by()
+        if pk is None:
+            validators = recipes.aggregate(
+                Max("created_at"), Max("updated_at")
+            ).values()
+        else:
+            try:
+                validators = recipes.filter(pk=pk).values_list(
+                    "created_at", "updated_at"
+                ).first()
+            except (TypeError, ValueError):
+                return None
+            if validators is None:
+                return None
+        return make_etag(
+            request, response_version(request), *validators, per_user=True
+        )
 
     def get_serializer_class(self):
         if self.action in ["create", "partial_update"]:
@@ -58,14 +105,10 @@ class RecipesViewSet(ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        base = self.queryset.prefetch_related("tags")
+        queryset = Recipe.objects.for_feed()
         if user.is_authenticated:
-            return (
-                Recipe.objects.with_user_flags(user)
-                .select_related("author")
-                .prefetch_related("tags")
-            )
-        return base
+            return queryset.with_user_flags(user)
+        return queryset
 
     @action(
         methods=["post", "delete"],
@@ -120,19 +163,39 @@ class RecipesViewSet(ModelViewSet):
         methods=["get"],
         permission_classes=[IsAuthenticated],
         url_path="download_shopping_cart",
+        # ?format= выбирает формат файла, а не рендерер DRF
+        content_negotiation_class=IgnoreFormatContentNegotiation,
     )
     def download_cart(self, request):
-        shopping_list = build_shopping_list(request.user)
-        file_buffer = io.BytesIO(shopping_list.encode("utf-8"))
-        response = FileResponse(
-            file_buffer,
-            content_type="text/plain; charset=utf-8"
-        )
+        fmt = request.query_params.get("format", "txt").lower()
+        try:
+            content, content_type, filename = stream_shopping_list(
+                request.user, fmt
+            )
+        except UnsupportedFormat as error:
+            return Response(
+                {"detail": str(error)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        response = StreamingHttpResponse(content, content_type=content_type)
         response["Content-Disposition"] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="{filename}"'
         )
         return response
 
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        url_path="feed",
+    )
+    def feed(self, request):
+        """Рецепты авторов, на которых подписан пользователь."""
+        paginator = FeedTimelinePagination()
+        page = paginator.paginate_queryset(self.get_queryset(), request, self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=["get"], url_path="get-link")
     def get_link(self, request, pk=None):
         recipe = self.get_object()
@@ -141,16 +204,49 @@ class RecipesViewSet(ModelViewSet):
         return Response({"short-link": url})
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class CatalogViewSetMixin:
+    """Чтение справочника из снимка в памяти процесса вместо БД."""
+
+    catalog_section = None
+
+    def get_queryset(self):
+        return list(getattr(get_catalog(), self.catalog_section).values())
+
+    def filter_queryset(self, queryset):
+        return queryset
+
+    def get_object(self):
+        section = getattr(get_catalog(), self.catalog_section)
+        try:
+            obj = section[int(self.kwargs[self.lookup_field])]
+        except (KeyError, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class TagViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для работы с тэгом."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = None
+    catalog_section = "tags"
 
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag(request, catalog_version())
+
+
+class IngredientViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Вьюсет для получения списка ингредиентов.
     """
@@ -158,8 +254,33 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.order_by("name")
     serializer_class = IngredientSerializer
     pagination_class = None
-    filter_backends = [IngredientNameSearch]
-    search_fields = ["^name"]  # автокомплит с начала строки
+    search_param = "name"
+    catalog_section = "ingredients"
+
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag(request, catalog_version())
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        # автокомплит отвечает из индекса в памяти, без запросов к БД
+        index = get_catalog().ingredient_index
+        name = request.query_params.get(self.search_param, "")
+        if name.strip():
+            entries = index.search(name, settings.INGREDIENT_SEARCH_LIMIT)
+        else:
+            entries = index.entries
+        return Response([
+            {
+                "id": entry.id,
+                "name": entry.name,
+                "measurement_unit": entry.measurement_unit,
+            }
+            for entry in entries
+        ])
 
 
 class UserProfileViewSet(viewsets.ReadOnlyModelViewSet):
@@ -177,11 +298,14 @@ class UserProfileViewSet(viewsets.ReadOnlyModelViewSet):
         target = get_object_or_404(User, pk=pk)
 
         if request.method == "POST":
+            recipes_limit = self.get_recipes_limit()
             serializer = AddSubscriptionSerializer(
                 data={}, context={"request": request, "target": target}
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            target.is_subscribed = True
+            self.prefetch_latest_recipes([target], recipes_limit)
             data = SubscriptionSerializer(
                 target,
                 context={"request": request}
@@ -206,27 +330,36 @@ class UserProfileViewSet(viewsets.ReadOnlyModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def my_subscriptions(self, request):
-        limit_raw = request.query_params.get("recipes_limit")
-        try:
-            limit = int(limit_raw) if limit_raw is not None else None
-        except (TypeError, ValueError):
-            limit = None
-
-        recipes_qs = Recipe.objects.all()
-        if limit and limit > 0:
-            recipes_qs = recipes_qs[:limit]
-
-        authors_qs = (
-            User.objects
-            .filter(subscribers__user=request.user)
-            .annotate(recipes_count=Count("recipes_created"))
-            .prefetch_related(Prefetch("recipes_created", queryset=recipes_qs))
-        )
+        recipes_limit = self.get_recipes_limit()
+        authors_qs = User.objects.filter(
+            subscribers__user=request.user
+        ).annotate(is_subscribed=Value(True))
 
         page = self.paginate_queryset(authors_qs)
+        self.prefetch_latest_recipes(page, recipes_limit)
         serializer = SubscriptionSerializer(
             page,
             many=True,
             context={"request": request}
         )
         return self.get_paginated_response(serializer.data)
+
+    def get_recipes_limit(self):
+        params = SubscriptionParamsSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data.get("recipes_limit")
+
+    def prefetch_latest_recipes(self, authors, limit):
+        """Рецепты авторов одним запросом, до limit на каждого."""
+        recipes = Recipe.objects.order_by("-created_at", "-id")
+        if limit is not None:
+            recipes = recipes.latest_by_authors(
+                [author.id for author in authors], limit
+            )
+        prefetch_related_objects(authors, Prefetch(
+            "recipes_created",
+            queryset=recipes.only(
+                "id", "author", "name", "image", "image_thumb",
+                "cooking_time",
+            ),
+        ))
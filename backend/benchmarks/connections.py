@@ -0,0 +1,106 @@
+"""
+Пропускная способность gunicorn (gthread) с новым соединением к
+PostgreSQL на каждый запрос (DB_CONN_MAX_AGE=0) и с постоянными
+соединениями; с --pgbouncer — ещё и через PgBouncer
+(DB_POOL_MODE=pgbouncer), который проксирует ту же БД.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.connections --concurrency 16 --duration 10
+    python -m benchmarks.connections --pgbouncer 127.0.0.1:6432
+"""
+
+import argparse
+
+from benchmarks.utils import (
+    database_env,
+    gunicorn_server,
+    http_load,
+    setup_django,
+    temporary_database,
+)
+
+
+def seed(recipes):
+    from rest_framework.authtoken.models import Token
+
+    from recipes.models import Recipe
+    from users.models import User
+
+    author = User.objects.create_user(
+        email="bench@example.com",
+        username="bench",
+        first_name="Bench",
+        last_name="Mark",
+        password="benchmark-password",
+    )
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author,
+            name=f"Рецепт {number}",
+            text="Описание",
+            image="recipe_images/temp.jpeg",
+            cooking_time=10,
+        )
+        for number in range(recipes)
+    )
+    return Token.objects.create(user=author).key
+
+
+def modes(pgbouncer):
+    yield "DB_CONN_MAX_AGE=0", {"DB_CONN_MAX_AGE": "0"}
+    yield "DB_CONN_MAX_AGE=60", {"DB_CONN_MAX_AGE": "60"}
+    if pgbouncer:
+        host, port = pgbouncer.rsplit(":", 1)
+        yield "PgBouncer (transaction)", {
+            "DB_CONN_MAX_AGE": "60",
+            "DB_POOL_MODE": "pgbouncer",
+            "DB_HOST": host,
+            "DB_PORT": port,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", default="/api/recipes/?limit=6")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--recipes", type=int, default=100)
+    parser.add_argument(
+        "--pgbouncer",
+        metavar="HOST:PORT",
+        help="PgBouncer, у которого есть доступ к временной БД",
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    with temporary_database():
+        # аутентифицированный запрос не попадает в кеш ответов
+        headers = {"Authorization": f"Token {seed(args.recipes)}"}
+        print(
+            f"GET {args.path}: gunicorn gthread {args.workers}x"
+            f"{args.threads}, клиентов {args.concurrency}, "
+            f"{args.duration:.0f} с"
+        )
+        for title, env in modes(args.pgbouncer):
+            with gunicorn_server(
+                "--worker-class", "gthread",
+                "--workers", str(args.workers),
+                "--threads", str(args.threads),
+                env={**database_env(), **env},
+            ) as url:
+                rps, stats, errors = http_load(
+                    url + args.path, args.concurrency, args.duration,
+                    headers,
+                )
+            print(
+                f"{title:<28} {rps:8.1f} запр/с  "
+                f"p50={stats['p50']:7.2f} мс  p95={stats['p95']:7.2f} мс  "
+                f"p99={stats['p99']:7.2f} мс  ошибок: {errors}"
+            )
+
+
+if __name__ == "__main__":
+    main()
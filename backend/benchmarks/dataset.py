@@ -0,0 +1,194 @@
+"""
+Синтетический набор данных для бенчмарков: пользователи, рецепты с
+ингредиентами из data/ingredients.csv, избранное, списки покупок и
+подписки. При одинаковых параметрах и seed набор одинаков, поэтому
+результаты разных коммитов можно сравнивать.
+
+Данные пишутся bulk_create, в обход сигналов, поэтому счётчики, итоги
+списков покупок, ленты подписок и рейтинг пересчитываются в конце так
+же, как это делают команды обслуживания.
+"""
+
+import random
+from io import StringIO
+from pathlib import Path
+
+DEFAULT_INGREDIENTS = (
+    Path(__file__).resolve().parents[2] / "data" / "ingredients.csv"
+)
+
+TAGS = (
+    ("Завтрак", "breakfast"),
+    ("Обед", "lunch"),
+    ("Ужин", "dinner"),
+    ("Десерт", "dessert"),
+)
+
+BATCH_SIZE = 5000
+
+
+def add_arguments(parser):
+    """Параметры набора данных для argparse бенчмарка."""
+    group = parser.add_argument_group("набор данных")
+    group.add_argument("--users", type=int, default=200)
+    group.add_argument("--recipes", type=int, default=2000)
+    group.add_argument("--ingredients-per-recipe", type=int, default=8)
+    group.add_argument("--favorites-per-user", type=int, default=20)
+    group.add_argument("--cart-per-user", type=int, default=5)
+    group.add_argument("--follows-per-user", type=int, default=10)
+    group.add_argument("--seed", dest="random_seed", type=int, default=0)
+    group.add_argument(
+        "--ingredients", type=Path, default=DEFAULT_INGREDIENTS,
+        help="CSV или JSON для load_ingredients",
+    )
+
+
+def options(args):
+    """Параметры seed() из разобранных аргументов; они же идут в отчёт."""
+    return {
+        "users": args.users,
+        "recipes": args.recipes,
+        "ingredients_per_recipe": args.ingredients_per_recipe,
+        "favorites_per_user": args.favorites_per_user,
+        "cart_per_user": args.cart_per_user,
+        "follows_per_user": args.follows_per_user,
+        "random_seed": args.random_seed,
+        "ingredients": str(args.ingredients),
+    }
+
+
+def _sample(rng, population, count):
+    return rng.sample(population, min(count, len(population)))
+
+
+def seed(
+    users, recipes, ingredients_per_recipe, favorites_per_user,
+    cart_per_user, follows_per_user, random_seed=0,
+    ingredients=DEFAULT_INGREDIENTS,
+):
+    """
+    Заполняет БД и возвращает словарь с токеном читателя и значениями
+    для путей сценариев: рецепт, автор, тег, слово для поиска и начало
+    названия ингредиента.
+    """
+    from django.core.management import call_command
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+
+    from recipes import cart_totals, counters, feeds
+    from recipes.models import (
+        MAX_LENGTH,
+        Favorite,
+        Ingredient,
+        Recipe,
+        RecipeIngredientAmount,
+        ShoppingCart,
+        Tag,
+    )
+    from recipes.ranking import compute_trending
+    from users.models import Subscription, User
+
+    rng = random.Random(random_seed)
+    call_command("load_ingredients", str(ingredients), stdout=StringIO())
+    ingredient_rows = list(
+        Ingredient.objects.order_by("id").values_list("id", "name")
+    )
+    tags = Tag.objects.bulk_create(
+        Tag(name=name, slug=slug) for name, slug in TAGS
+    )
+    people = User.objects.bulk_create(
+        User(
+            email=f"user{number}@example.com",
+            username=f"user{number}",
+            first_name="Пользователь",
+            last_name=str(number),
+        )
+        for number in range(users)
+    )
+
+    main_ingredients = [rng.choice(ingredient_rows) for _ in range(recipes)]
+    dishes = Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author=rng.choice(people),
+                name=f"{name.capitalize()} по-домашнему {number}"[:MAX_LENGTH],
+                text="Смешать, довести до готовности и подать.",
+                image="recipe_images/temp.jpeg",
+                cooking_time=rng.randint(5, 180),
+            )
+            for number, (_, name) in enumerate(main_ingredients)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    ingredient_ids = [pk for pk, _ in ingredient_rows]
+    RecipeIngredientAmount.objects.bulk_create(
+        (
+            RecipeIngredientAmount(
+                recipe=dish, ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for dish, (main_id, _) in zip(dishes, main_ingredients)
+            for ingredient_id in {
+                main_id,
+                *_sample(rng, ingredient_ids, ingredients_per_recipe - 1),
+            }
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe=dish, tag=tag)
+            for dish in dishes
+            for tag in _sample(rng, tags, rng.randint(1, 2))
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    for model, per_user in (
+        (Favorite, favorites_per_user),
+        (ShoppingCart, cart_per_user),
+    ):
+        model.objects.bulk_create(
+            (
+                model(user=person, recipe=dish)
+                for person in people
+                for dish in _sample(rng, dishes, per_user)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    Subscription.objects.bulk_create(
+        (
+            Subscription(user=person, author=author)
+            for person in people
+            for author in _sample(rng, people, follows_per_user)
+            if author != person
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    with connection.cursor() as cursor:
+        # даты по порядку id, как если бы рецепты публиковались раз в
+        # несколько минут: лента и курсор видят реальный порядок
+        cursor.execute(
+            f"UPDATE {Recipe._meta.db_table} SET "
+            "created_at = now() - (%s - id) * interval '7 minutes', "
+            "updated_at = now() - (%s - id) * interval '7 minutes'",
+            [dishes[-1].id, dishes[-1].id],
+        )
+    counters.reconcile()
+    cart_totals.rebuild()
+    feeds.rebuild()
+    compute_trending()
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    reader = people[0]
+    _, main_name = main_ingredients[0]
+    return {
+        "token": Token.objects.create(user=reader).key,
+        "recipe": dishes[len(dishes) // 2].id,
+        "author": dishes[0].author_id,
+        "tag": tags[0].slug,
+        "word": main_name.split()[0],
+        "prefix": main_name[:3],
+    }
@@ -0,0 +1,170 @@
+"""
+Лента подписок (/api/recipes/feed/): рассылка рецепта автора с 10 000
+подписчиков и чтение страницы ленты подписчика — соединением подписок
+с рецептами при запросе, из таблицы лент и в гибридном режиме, когда
+популярный автор читается при запросе.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.feed --followers 10000
+"""
+
+import argparse
+import random
+
+from benchmarks.utils import (
+    measure,
+    report,
+    setup_django,
+    temporary_database,
+)
+
+
+def seed(followers, authors, follows, recipes_per_author):
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+
+    from recipes import counters
+    from recipes.models import Recipe
+    from users.models import Subscription, User
+
+    def make_users(prefix, count):
+        return User.objects.bulk_create(
+            User(
+                email=f"{prefix}{number}@example.com",
+                username=f"{prefix}{number}",
+                first_name=prefix,
+                last_name=str(number),
+            )
+            for number in range(count)
+        )
+
+    popular = make_users("popular", 1)[0]
+    writers = make_users("author", authors)
+    readers = make_users("reader", followers)
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author,
+            name=f"Рецепт {number}",
+            text="Описание",
+            image="recipe_images/temp.jpeg",
+            cooking_time=10,
+        )
+        for author in [popular] + writers
+        for number in range(recipes_per_author)
+    )
+    rng = random.Random(0)
+    for start in range(0, followers, 1000):
+        Subscription.objects.bulk_create(
+            Subscription(user=reader, author=author)
+            for reader in readers[start:start + 1000]
+            for author in [popular] + rng.sample(writers, follows)
+        )
+    counters.reconcile()
+    with connection.cursor() as cursor:
+        for model in (User, Subscription, Recipe):
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+    return popular, readers[0], Token.objects.create(user=readers[0]).key
+
+
+def rebuild_feeds():
+    from django.db import connection
+
+    from recipes import feeds
+    from recipes.models import FeedEntry
+
+    feeds.rebuild()
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {FeedEntry._meta.db_table}")
+    return FeedEntry.objects.count()
+
+
+def fan_out_runs(author, count):
+    from recipes import feeds
+    from recipes.models import Recipe
+
+    recipes = iter(Recipe.objects.bulk_create(
+        Recipe(
+            author=author,
+            name=f"Новый рецепт {number}",
+            text="Описание",
+            image="recipe_images/temp.jpeg",
+            cooking_time=10,
+        )
+        for number in range(count)
+    ))
+    return lambda: feeds.fan_out(next(recipes).id)
+
+
+def read_pages(reader, client, limit, repeat):
+    from recipes import feeds
+    from recipes.models import Recipe
+
+    report(
+        "  JOIN подписок и рецептов",
+        measure(lambda: list(
+            Recipe.objects.filter(author__subscribers__user=reader)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)[:limit]
+        ), repeat),
+    )
+    report(
+        "  feeds.timeline",
+        measure(lambda: feeds.timeline(reader, limit), repeat),
+    )
+    report(
+        f"  GET /api/recipes/feed/?limit={limit}",
+        measure(
+            lambda: client.get("/api/recipes/feed/", {"limit": limit}),
+            repeat,
+        ),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--followers", type=int, default=10000)
+    parser.add_argument("--authors", type=int, default=200)
+    parser.add_argument("--follows", type=int, default=20)
+    parser.add_argument("--recipes-per-author", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    with temporary_database():
+        popular, reader, token = seed(
+            args.followers, args.authors, args.follows,
+            args.recipes_per_author,
+        )
+
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        print(
+            f"Подписчиков у популярного автора: {args.followers}, "
+            f"ещё подписок у читателя: {args.follows}, "
+            f"рецептов у автора: {args.recipes_per_author}"
+        )
+
+        settings.FEED_PULL_THRESHOLD = args.followers + 1
+        print(f"Рассылка всем (записей в лентах: {rebuild_feeds()})")
+        report(
+            f"  fan_out рецепта на {args.followers}",
+            measure(fan_out_runs(popular, args.repeat + 1), args.repeat),
+        )
+        read_pages(reader, client, args.limit, args.repeat)
+
+        settings.FEED_PULL_THRESHOLD = args.followers
+        print(
+            "Гибрид: популярный автор читается при запросе "
+            f"(записей в лентах: {rebuild_feeds()})"
+        )
+        read_pages(reader, client, args.limit, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Задержка поиска рецептов (?search=) на синтетической базе.
+
+Запуск из каталога backend (нужен PostgreSQL с pg_trgm):
+
+    python -m benchmarks.recipe_search --recipes 100000
+"""
+
+import argparse
+import random
+
+from benchmarks.utils import (
+    measure,
+    report,
+    setup_django,
+    temporary_database,
+)
+
+DISHES = [
+    "борщ", "суп", "салат", "пирог", "рагу", "плов", "омлет", "каша",
+    "запеканка", "котлеты", "блины", "паста", "ризотто", "жаркое", "торт",
+]
+INGREDIENTS = [
+    "курица", "говядина", "рис", "грибы", "картофель", "капуста", "свекла",
+    "яблоки", "шоколад", "сыр", "томаты", "тыква", "фасоль", "лосось",
+    "творог", "шпинат", "баклажаны", "морковь", "кабачки", "чечевица",
+]
+STEPS = [
+    "нарезать", "обжарить", "посолить", "перемешать", "довести до кипения",
+    "запекать", "остудить", "подавать", "добавить специи", "тушить",
+    "взбить", "процедить", "измельчить", "потушить под крышкой",
+]
+QUERIES = [
+    "борщ",
+    "курица с рисом",
+    "шоколадный торт",
+    "пирог яблоки",
+    "грибной суп",
+    "рагу из тыквы",
+]
+
+
+def seed(count, batch_size=5000):
+    from django.db import connection
+
+    from recipes.models import Recipe
+    from users.models import User
+
+    author = User.objects.create_user(
+        email="bench@example.com",
+        username="bench",
+        first_name="Bench",
+        last_name="Mark",
+        password="benchmark-password",
+    )
+    rng = random.Random(0)
+    for start in range(0, count, batch_size):
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=(
+                    f"{rng.choice(DISHES).capitalize()} "
+                    f"с {rng.choice(INGREDIENTS)}"
+                ),
+                text=" ".join(
+                    rng.choices(STEPS, k=10) + rng.choices(INGREDIENTS, k=2)
+                ),
+                image="recipe_images/temp.jpeg",
+                cooking_time=rng.randint(5, 180),
+            )
+            for _ in range(min(batch_size, count - start))
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {Recipe._meta.db_table}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    with temporary_database():
+        seed(args.recipes)
+
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        print(f"Рецептов в базе: {args.recipes}")
+        for query in QUERIES:
+            stats = measure(
+                lambda: client.get("/api/recipes/", {"search": query}),
+                args.repeat,
+            )
+            report(f"search={query!r}", stats)
+
+
+if __name__ == "__main__":
+    main()
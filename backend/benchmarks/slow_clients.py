@@ -0,0 +1,115 @@
+"""
+Медленные клиенты: пока N соединений по байту присылают заголовки
+запроса, остальные клиенты запрашивают ленту рецептов. Синхронный
+воркер gunicorn занят медленным клиентом целиком, UvicornWorker
+(SERVER_MODE=asgi) ждёт его в цикле событий и продолжает отвечать.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.slow_clients --slow 8 --duration 10
+"""
+
+import argparse
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.connections import seed
+from benchmarks.utils import (
+    database_env,
+    gunicorn_server,
+    http_load,
+    setup_django,
+    temporary_database,
+)
+
+
+def slow_client(url, path, interval, deadline):
+    """
+    Присылает заголовки запроса по байту раз в interval секунд и
+    закрывает соединение к deadline.
+    """
+    parts = urlsplit(url)
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+        + "X-Padding: " + "x" * 1000 + "\r\n\r\n"
+    ).encode()
+    with socket.create_connection((parts.hostname, parts.port)) as sock:
+        for byte in request:
+            time.sleep(interval)
+            if time.monotonic() > deadline:
+                return
+            try:
+                sock.send(bytes([byte]))
+            except OSError:
+                return
+
+
+def servers(workers):
+    processes = ("--workers", str(workers))
+    yield (
+        "gunicorn sync (WSGI)",
+        "foodgram_backend.wsgi",
+        processes + ("--worker-class", "sync"),
+        {},
+    )
+    yield (
+        "gunicorn + UvicornWorker (ASGI)",
+        "foodgram_backend.asgi",
+        processes + ("--worker-class", "uvicorn_worker.UvicornWorker"),
+        {"SERVER_MODE": "asgi"},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", default="/api/recipes/?limit=6")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--slow", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--recipes", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+    with temporary_database():
+        headers = {"Authorization": f"Token {seed(args.recipes)}"}
+        print(
+            f"GET {args.path}: воркеров {args.workers}, медленных клиентов "
+            f"{args.slow} (байт раз в {args.interval} с), быстрых "
+            f"{args.concurrency}, {args.duration:.0f} с"
+        )
+        for title, app, options, env in servers(args.workers):
+            with gunicorn_server(
+                *options, app=app, env={**database_env(), **env}
+            ) as url:
+                # медленные клиенты успевают занять соединения до замера
+                warmup = args.interval * 2
+                deadline = time.monotonic() + warmup + args.duration
+                threads = [
+                    threading.Thread(
+                        target=slow_client,
+                        args=(url, args.path, args.interval, deadline),
+                    )
+                    for _ in range(args.slow)
+                ]
+                for thread in threads:
+                    thread.start()
+                time.sleep(warmup)
+                rps, stats, errors = http_load(
+                    url + args.path, args.concurrency, args.duration,
+                    headers,
+                )
+                for thread in threads:
+                    thread.join()
+            print(
+                f"{title:<32} {rps:8.1f} запр/с  "
+                f"p50={stats['p50']:7.2f} мс  p95={stats['p95']:7.2f} мс  "
+                f"p99={stats['p99']:7.2f} мс  ошибок: {errors}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Страница подписок (/api/users/subscriptions/) у пользователя,
+подписанного на сотни авторов, и сравнение двух способов выбрать
+последние рецепты каждого автора: срез в Prefetch и LATERAL с LIMIT
+по индексу (Recipe.objects.latest_by_authors). Срез в Prefetch Django
+4.2 поддерживает: он фильтрует по ROW_NUMBER() OVER (PARTITION BY
+author_id), для чего нумерует все рецепты авторов страницы.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.subscriptions --authors 600 --recipes-per-author 50
+"""
+
+import argparse
+
+from benchmarks.utils import (
+    measure,
+    report,
+    setup_django,
+    temporary_database,
+)
+
+
+def seed(authors, recipes_per_author):
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+
+    from recipes.models import Recipe
+    from users.models import Subscription, User
+
+    reader = User.objects.create_user(
+        email="reader@example.com",
+        username="reader",
+        first_name="Reader",
+        last_name="Bench",
+        password="benchmark-password",
+    )
+    created = User.objects.bulk_create(
+        User(
+            email=f"author{number}@example.com",
+            username=f"author{number}",
+            first_name="Author",
+            last_name=str(number),
+            recipes_count=recipes_per_author,
+        )
+        for number in range(authors)
+    )
+    Subscription.objects.bulk_create(
+        Subscription(user=reader, author=author) for author in created
+    )
+    for author in created:
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f"Рецепт {number}",
+                text="Описание",
+                image="recipe_images/temp.jpeg",
+                cooking_time=10,
+            )
+            for number in range(recipes_per_author)
+        )
+    with connection.cursor() as cursor:
+        for model in (User, Subscription, Recipe):
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+    return Token.objects.create(user=reader).key
+
+
+def prefetch_strategies(page_size, recipes_limit):
+    from django.db.models import Prefetch, prefetch_related_objects
+
+    from recipes.models import Recipe
+    from users.models import User
+
+    def sliced():
+        authors = list(User.objects.filter(
+            subscribers__user__username="reader"
+        )[:page_size])
+        recipes = Recipe.objects.order_by("-created_at", "-id")
+        prefetch_related_objects(authors, Prefetch(
+            "recipes_created",
+            queryset=recipes[:recipes_limit],
+            to_attr="latest_recipes",
+        ))
+
+    def lateral():
+        authors = list(User.objects.filter(
+            subscribers__user__username="reader"
+        )[:page_size])
+        prefetch_related_objects(authors, Prefetch(
+            "recipes_created",
+            queryset=Recipe.objects.latest_by_authors(
+                [author.id for author in authors], recipes_limit
+            ),
+        ))
+
+    return {"срез в Prefetch": sliced, "LATERAL + LIMIT": lateral}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--authors", type=int, default=600)
+    parser.add_argument("--recipes-per-author", type=int, default=50)
+    parser.add_argument("--recipes-limit", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+    with temporary_database():
+        token = seed(args.authors, args.recipes_per_author)
+
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        print(
+            f"Подписок: {args.authors}, рецептов у автора: "
+            f"{args.recipes_per_author}, recipes_limit={args.recipes_limit}"
+        )
+        for page_size in (6, 100):
+            stats = measure(
+                lambda: client.get("/api/users/subscriptions/", {
+                    "limit": page_size,
+                    "recipes_limit": args.recipes_limit,
+                }),
+                args.repeat,
+            )
+            report(f"GET subscriptions limit={page_size}", stats)
+            strategies = prefetch_strategies(page_size, args.recipes_limit)
+            for title, func in strategies.items():
+                report(
+                    f"  {title} ({page_size} авторов)",
+                    measure(func, args.repeat),
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Набор бенчмарков API на синтетических данных (benchmarks.dataset):
+лента рецептов с фильтрами, лента подписок, карточка рецепта, поиск
+ингредиентов, скачивание списка покупок и подписки. Все запросы от
+имени одного читателя, поэтому кеш анонимных ответов не участвует.
+
+По умолчанию запросы идут через тестовый клиент Django в этом процессе:
+для каждого сценария — p50/p95/p99, число SQL-запросов на запрос и RSS
+процесса. С --http сценарии нагружают gunicorn с gunicorn.conf.py
+(воркеры настраиваются переменными GUNICORN_*): запросы в секунду,
+перцентили и RSS сервера вместе с воркерами.
+
+Результаты сохраняются в JSON (--output) вместе с коммитом и
+параметрами набора; --compare показывает изменения относительно
+прошлого файла.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --recipes 20000 --compare bench.json
+    python -m benchmarks.suite --http --duration 10 --only feed detail
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import dataset
+from benchmarks.utils import (
+    database_env,
+    gunicorn_server,
+    http_load,
+    process_tree_rss_mb,
+    reset_peak_rss,
+    rss_mb,
+    setup_django,
+    summarize,
+    temporary_database,
+)
+
+SCENARIOS = (
+    ("feed", "/api/recipes/?limit=6"),
+    ("feed_tags", "/api/recipes/?limit=6&tags={tag}"),
+    ("feed_author", "/api/recipes/?limit=6&author={author}"),
+    ("feed_favorited", "/api/recipes/?limit=6&is_favorited=1"),
+    ("feed_in_cart", "/api/recipes/?limit=6&is_in_shopping_cart=1"),
+    ("feed_popular", "/api/recipes/?limit=6&ordering=popular"),
+    ("feed_search", "/api/recipes/?limit=6&search={word}"),
+    ("feed_cursor", "/api/recipes/?limit=6&cursor="),
+    ("subscription_feed", "/api/recipes/feed/?limit=6"),
+    ("detail", "/api/recipes/{recipe}/"),
+    ("ingredient_search", "/api/ingredients/?name={prefix}"),
+    ("shopping_cart", "/api/recipes/download_shopping_cart/"),
+    ("subscriptions", "/api/users/subscriptions/?limit=6&recipes_limit=3"),
+)
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_client(scenarios, headers, repeat, warmup):
+    """Сценарии через тестовый клиент: задержка, SQL-запросы и RSS."""
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client(**headers)
+    results = {}
+    for name, path in scenarios:
+        for _ in range(warmup):
+            client.get(path).getvalue()
+        reset_peak_rss()
+        baseline = rss_mb()
+        timings, queries, errors = [], [], 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(path)
+                # потоковые ответы генерируются при чтении
+                response.getvalue()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+            errors += response.status_code != 200
+        results[name] = {
+            "path": path,
+            **summarize(timings),
+            "queries": max(queries),
+            "errors": errors,
+            "rss_mb": rss_mb(),
+            "peak_rss_growth_mb": rss_mb("VmHWM") - baseline,
+        }
+    return results
+
+
+def run_http(scenarios, headers, concurrency, duration):
+    """Сценарии через gunicorn: запросы в секунду, задержка и RSS."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        pidfile = Path(tmp) / "gunicorn.pid"
+        with gunicorn_server(
+            "--pid", str(pidfile), env=database_env()
+        ) as url:
+            pid = pidfile.read_text().strip()
+            for name, path in scenarios:
+                rps, stats, errors = http_load(
+                    url + path, concurrency, duration, headers,
+                )
+                results[name] = {
+                    "path": path,
+                    "rps": rps,
+                    **stats,
+                    "errors": errors,
+                    "server_rss_mb": process_tree_rss_mb(pid),
+                }
+    return results
+
+
+def print_results(results, previous):
+    for name, result in results.items():
+        line = (
+            f"{name:<20} p50={result['p50']:8.2f} мс  "
+            f"p95={result['p95']:8.2f} мс  p99={result['p99']:8.2f} мс"
+        )
+        if "rps" in result:
+            line += f"  {result['rps']:7.1f} запр/с"
+            line += f"  RSS {result['server_rss_mb']:6.1f} МБ"
+        else:
+            line += f"  SQL {result['queries']:3}"
+            line += f"  RSS {result['rss_mb']:6.1f} МБ"
+        if result["errors"]:
+            line += f"  ошибок: {result['errors']}"
+        before = previous.get(name)
+        if before:
+            change = (result["p95"] / before["p95"] - 1) * 100
+            line += f"  p95 {change:+.0f}%"
+            if "queries" in result and "queries" in before:
+                line += f" SQL {result['queries'] - before['queries']:+d}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--only", nargs="+", metavar="SCENARIO",
+        choices=[name for name, _ in SCENARIOS],
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--http", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--output", type=Path, help="файл для JSON")
+    parser.add_argument(
+        "--compare", type=Path, help="JSON прошлого запуска для сравнения"
+    )
+    dataset.add_arguments(parser)
+    args = parser.parse_args()
+
+    setup_django()
+    options = dataset.options(args)
+    previous = {}
+    if args.compare:
+        report = json.loads(args.compare.read_text())
+        previous = report["results"]
+        if report["dataset"] != options:
+            print(
+                f"⚠️ Набор данных в {args.compare} другой: "
+                f"{report['dataset']}"
+            )
+    with temporary_database():
+        started = time.perf_counter()
+        context = dataset.seed(**options)
+        print(
+            f"Набор данных: {options['users']} пользователей, "
+            f"{options['recipes']} рецептов "
+            f"({time.perf_counter() - started:.1f} с)"
+        )
+        scenarios = [
+            (name, path.format(**context))
+            for name, path in SCENARIOS
+            if not args.only or name in args.only
+        ]
+        token = context["token"]
+        if args.http:
+            results = run_http(
+                scenarios, {"Authorization": f"Token {token}"},
+                args.concurrency, args.duration,
+            )
+        else:
+            results = run_client(
+                scenarios, {"HTTP_AUTHORIZATION": f"Token {token}"},
+                args.repeat, args.warmup,
+            )
+    print_results(results, previous)
+
+    if args.output:
+        args.output.write_text(json.dumps(
+            {
+                "commit": current_commit(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "mode": "http" if args.http else "client",
+                # настройки сервера для --http
+                "server": {
+                    key: value for key, value in os.environ.items()
+                    if key.startswith("GUNICORN_") or key == "SERVER_MODE"
+                },
+                "dataset": options,
+                "results": results,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ))
+        print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Пиковая память процесса при разборе изображения из base64 (data URL):
+прежний способ (split + b64decode целиком) против потокового
+декодирования Base64ImageField. Каждый вариант запускается в отдельном
+процессе; перед разбором пик RSS (VmHWM) сбрасывается через
+/proc/self/clear_refs, и его прирост показывает, сколько памяти
+потребовал сам разбор. Нужен Linux, БД не нужна.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.upload_memory --size-mb 10
+"""
+
+import argparse
+import base64
+import json
+import os
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+from benchmarks.utils import reset_peak_rss, rss_mb, setup_django
+
+VARIANTS = ("legacy", "streaming")
+
+
+def make_payload(size_mb):
+    """PNG из шума (почти не сжимается) размером около size_mb."""
+    from PIL import Image
+
+    side = int((size_mb * 1024 * 1024 / 3) ** 0.5)
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    buffer = BytesIO()
+    image.save(buffer, "PNG", compress_level=1)
+    return "data:image/png;base64," + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def parse_legacy(data):
+    from django.core.files.base import ContentFile
+    from rest_framework import serializers
+
+    fmt, imgstr = data.split(";base64,")
+    ext = fmt.split("/")[-1]
+    content = ContentFile(base64.b64decode(imgstr), name=f"image.{ext}")
+    return serializers.ImageField().to_internal_value(content)
+
+
+def parse_streaming(data):
+    from api.serializers import Base64ImageField
+
+    field = Base64ImageField(max_upload_size=64 * 1024 * 1024)
+    return field.to_internal_value(data)
+
+
+def run_variant(variant, size_mb):
+    setup_django()
+    payload = make_payload(size_mb)
+    parse = parse_legacy if variant == "legacy" else parse_streaming
+    reset_peak_rss()
+    baseline = rss_mb("VmRSS")
+    started = time.perf_counter()
+    image = parse(payload)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(json.dumps({
+        "variant": variant,
+        "file_mb": image.size / 1024 / 1024,
+        "payload_mb": len(payload) / 1024 / 1024,
+        "extra_rss_mb": rss_mb("VmHWM") - baseline,
+        "ms": elapsed,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument("--variant", choices=VARIANTS)
+    args = parser.parse_args()
+    if args.variant:
+        run_variant(args.variant, args.size_mb)
+        return
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.upload_memory",
+                "--variant", variant, "--size-mb", str(args.size_mb),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{variant:<10} файл {result['file_mb']:6.1f} МБ  "
+            f"base64 {result['payload_mb']:6.1f} МБ  "
+            f"прирост RSS {result['extra_rss_mb']:7.1f} МБ  "
+            f"{result['ms']:8.1f} мс"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Общие помощники бенчмарков: окружение Django, временная БД, замеры,
+память процессов, запуск gunicorn и HTTP-нагрузка.
+"""
+
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+
+def setup_django():
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "foodgram_backend.settings"
+    )
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def temporary_database():
+    """Отдельная тестовая БД (test_<имя>), удаляемая после замера."""
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def percentile(ordered, pct):
+    index = round(pct / 100 * (len(ordered) - 1))
+    return ordered[min(len(ordered) - 1, index)]
+
+
+def summarize(timings):
+    """Перцентили и среднее по списку замеров в миллисекундах."""
+    ordered = sorted(timings)
+    return {
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "mean": statistics.fmean(ordered),
+        "runs": len(ordered),
+    }
+
+
+def measure(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return summarize(timings)
+
+
+def report(title, stats):
+    print(
+        f"{title:<40} p50={stats['p50']:8.2f} мс  "
+        f"p95={stats['p95']:8.2f} мс  p99={stats['p99']:8.2f} мс  "
+        f"(n={stats['runs']})"
+    )
+
+
+def reset_peak_rss():
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+
+
+def rss_mb(field="VmRSS", pid="self"):
+    """VmRSS или VmHWM (пик) из /proc/<pid>/status, в МБ."""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"Нет {field} в /proc/{pid}/status")
+
+
+def process_tree_rss_mb(pid):
+    """Суммарный RSS процесса и его прямых потомков (воркеров), в МБ."""
+    with open(f"/proc/{pid}/task/{pid}/children") as children:
+        pids = [pid, *children.read().split()]
+    return sum(rss_mb(pid=child) for child in pids)
+
+
+def database_env():
+    """Переменные окружения settings.py для текущей (временной) БД."""
+    from django.db import connection
+
+    db = connection.settings_dict
+    return {
+        "POSTGRES_DB": db["NAME"],
+        "POSTGRES_USER": db["USER"],
+        "POSTGRES_PASSWORD": db["PASSWORD"],
+        "DB_HOST": db["HOST"],
+        "DB_PORT": str(db["PORT"]),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def gunicorn_server(*args, app="foodgram_backend.wsgi", env=None, timeout=30):
+    """
+    gunicorn с приложением app в отдельном процессе; отдаёт адрес, когда
+    сервер начал принимать соединения.
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", app,
+            "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+            *args,
+        ],
+        env={**os.environ, **(env or {})},
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), 1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("gunicorn не запустился")
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def http_load(url, concurrency, duration, headers=None):
+    """
+    concurrency потоков запрашивают url в течение duration секунд.
+    Возвращает запросов в секунду, перцентили задержки и число ошибок.
+    """
+    timings = []
+    errors = []
+    deadline = time.monotonic() + duration
+
+    def client():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                with urlopen(Request(url, headers=headers or {})) as response:
+                    response.read()
+            except (URLError, OSError) as error:
+                errors.append(error)
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    return len(timings) / elapsed, summarize(timings), len(errors)
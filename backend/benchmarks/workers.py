@@ -0,0 +1,84 @@
+"""
+Пропускная способность ленты рецептов для каждого класса воркеров из
+gunicorn.conf.py: sync, gthread, gevent и uvicorn (SERVER_MODE=asgi).
+Воркеры настраиваются теми же переменными окружения, что и в образе.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.workers --workers 2 --concurrency 32
+    python -m benchmarks.workers --classes gthread gevent
+"""
+
+import argparse
+
+from benchmarks.connections import seed
+from benchmarks.utils import (
+    database_env,
+    gunicorn_server,
+    http_load,
+    setup_django,
+    temporary_database,
+)
+
+CLASSES = ("sync", "gthread", "gevent", "asgi")
+
+
+def server_env(worker_class, args):
+    env = {
+        "GUNICORN_WORKERS": str(args.workers),
+        "GUNICORN_THREADS": str(args.threads),
+    }
+    if worker_class == "asgi":
+        return "foodgram_backend.asgi", {**env, "SERVER_MODE": "asgi"}
+    return "foodgram_backend.wsgi", {
+        **env, "SERVER_MODE": "wsgi", "GUNICORN_WORKER_CLASS": worker_class,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", default="/api/recipes/?limit=6")
+    parser.add_argument(
+        "--classes", nargs="+", choices=CLASSES, default=CLASSES
+    )
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--recipes", type=int, default=100)
+    parser.add_argument(
+        "--anonymous",
+        action="store_true",
+        help="без токена: ответы отдаются из кеша анонимных ответов",
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    with temporary_database():
+        token = seed(args.recipes)
+        headers = {}
+        if not args.anonymous:
+            headers["Authorization"] = f"Token {token}"
+        print(
+            f"GET {args.path}: процессов {args.workers}, потоков gthread "
+            f"{args.threads}, клиентов {args.concurrency}, "
+            f"{args.duration:.0f} с"
+        )
+        for worker_class in args.classes:
+            app, env = server_env(worker_class, args)
+            with gunicorn_server(
+                app=app, env={**database_env(), **env}
+            ) as url:
+                rps, stats, errors = http_load(
+                    url + args.path, args.concurrency, args.duration,
+                    headers,
+                )
+            print(
+                f"{worker_class:<10} {rps:8.1f} запр/с  "
+                f"p50={stats['p50']:7.2f} мс  p95={stats['p95']:7.2f} мс  "
+                f"p99={stats['p99']:7.2f} мс  ошибок: {errors}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "django_filters",
@@ -88,11 +89,35 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "foodgram_backend.wsgi.application"
+ASGI_APPLICATION = "foodgram_backend.asgi.application"
+
+# SERVER_MODE=asgi — gunicorn с uvicorn-воркерами на asgi.py; горячие
+# GET-эндпоинты обслуживают асинхронные вьюхи из api/async_views.py
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi").lower()
+if SERVER_MODE not in ("wsgi", "asgi"):
+    raise ImproperlyConfigured(
+        f"Неизвестный SERVER_MODE: {SERVER_MODE}. Допустимо: wsgi, asgi."
+    )
+ASYNC_READ_VIEWS = SERVER_MODE == "asgi"
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DB_CONN_MAX_AGE — сколько секунд соединение переживает запрос
+# (0 — закрывается после каждого запроса); перед повторным
+# использованием оно проверяется (DB_CONN_HEALTH_CHECKS).
+# DB_POOL_MODE=pgbouncer — подключение через PgBouncer с
+# pool_mode=transaction (сервис pgbouncer в infra, DB_HOST=pgbouncer):
+# серверные курсоры iterator() не переживают возврат соединения в пул
+# и отключаются
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "").lower()
+if DB_POOL_MODE not in ("", "pgbouncer"):
+    raise ImproperlyConfigured(
+        f"Неизвестный DB_POOL_MODE: {DB_POOL_MODE}. "
+        "Допустимо: пусто или pgbouncer."
+    )
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -101,9 +126,102 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "password"),
         "HOST": os.getenv("DB_HOST", "db"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": (
+            os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True"
+        ),
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOL_MODE == "pgbouncer",
     }
 }
 
+# Для нескольких воркеров нужен общий кеш: в infra это сервис redis,
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache и
+# CACHE_LOCATION=redis://redis:6379/1 (или PyMemcacheCache для Memcached)
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# С кешем в памяти процесса версии справочников и ответов у каждого
+# воркера свои, и изменения в другом воркере здесь не видны: снимок
+# справочников, ответы для анонимов и ETag живут не дольше
+# LOCAL_CACHE_TTL сек
+CACHE_SHARED = CACHES["default"]["BACKEND"] not in (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+LOCAL_CACHE_TTL = int(os.getenv("LOCAL_CACHE_TTL", "5"))
+
+# Кеш количества рецептов в ленте: время жизни (сек) и порог, начиная
+# с которого для ленты без фильтров берётся оценка планировщика
+RECIPE_COUNT_CACHE_TTL = int(os.getenv("RECIPE_COUNT_CACHE_TTL", "30"))
+RECIPE_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv("RECIPE_COUNT_ESTIMATE_THRESHOLD", "100000")
+)
+
+# Время жизни (сек) закешированных ответов ленты для анонимов
+RECIPE_RESPONSE_CACHE_TTL = int(os.getenv("RECIPE_RESPONSE_CACHE_TTL", "300"))
+if not CACHE_SHARED:
+    RECIPE_RESPONSE_CACHE_TTL = min(RECIPE_RESPONSE_CACHE_TTL, LOCAL_CACHE_TTL)
+
+# Сколько ингредиентов возвращает автодополнение по ?name=
+INGREDIENT_SEARCH_LIMIT = int(os.getenv("INGREDIENT_SEARCH_LIMIT", "20"))
+
+# TTF-шрифт с кириллицей для списка покупок в формате pdf
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+# Обработка загружаемых изображений: предельный размер файла (байт),
+# допустимые размеры исходника, длинная сторона после сжатия,
+# формат (WEBP или JPEG) и качество
+IMAGE_MAX_UPLOAD_SIZE = int(
+    os.getenv("IMAGE_MAX_UPLOAD_SIZE", str(10 * 1024 * 1024))
+)
+IMAGE_MIN_SIDE = int(os.getenv("IMAGE_MIN_SIDE", "16"))
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", "40000000"))
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1600"))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "WEBP").upper()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+# Размеры миниатюр (ширина, высота) для карточек рецептов и аватаров
+RECIPE_THUMB_SIZE = (480, 360)
+AVATAR_THUMB_SIZE = (128, 128)
+
+# ?ordering=trending: события (избранное, корзина) за окно в днях,
+# вес которых убывает вдвое за период полураспада; корзина весит меньше.
+# Счёт пересчитывает воркер очереди раз в TRENDING_INTERVAL сек
+# (0 — только вручную, manage.py compute_trending)
+TRENDING_INTERVAL = int(os.getenv("TRENDING_INTERVAL", "600"))
+TRENDING_WINDOW_DAYS = int(os.getenv("TRENDING_WINDOW_DAYS", "14"))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "48"))
+TRENDING_CART_WEIGHT = float(os.getenv("TRENDING_CART_WEIGHT", "0.5"))
+
+# Лента подписок /api/recipes/feed/: рецепт при публикации добавляется
+# в ленты подписчиков автора. Авторы, у которых подписчиков не меньше
+# FEED_PULL_THRESHOLD, не рассылаются — их рецепты читаются при запросе.
+# Рассылка и подписка обрезают ленты до FEED_TIMELINE_SIZE записей
+# (после уменьшения размера — manage.py rebuild_feeds --trim)
+FEED_PULL_THRESHOLD = int(os.getenv("FEED_PULL_THRESHOLD", "5000"))
+FEED_TIMELINE_SIZE = int(os.getenv("FEED_TIMELINE_SIZE", "500"))
+
+# Фоновая очередь (таблица recipes.BackgroundTask, воркер run_worker).
+# TASK_QUEUE_EAGER=True выполняет задачи сразу в процессе — без воркера
+TASK_QUEUE_EAGER = os.getenv("TASK_QUEUE_EAGER", "False") == "True"
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "5"))
+# задержка (сек) перед первым повтором, дальше удваивается
+TASK_RETRY_DELAY = int(os.getenv("TASK_RETRY_DELAY", "10"))
+# задача в статусе running дольше этого (сек) считается брошенной
+TASK_STALE_TIMEOUT = int(os.getenv("TASK_STALE_TIMEOUT", "600"))
+# выполненные задачи хранятся TASK_KEEP_DONE сек; воркер удаляет их
+# раз в TASK_PURGE_INTERVAL сек
+TASK_KEEP_DONE = int(os.getenv("TASK_KEEP_DONE", str(24 * 60 * 60)))
+TASK_PURGE_INTERVAL = int(os.getenv("TASK_PURGE_INTERVAL", "3600"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,119 @@
+"""
+Настройки gunicorn; файл подхватывается из рабочего каталога, в образе
+это /app, поэтому контейнер запускается просто командой gunicorn.
+
+Переменные окружения:
+
+    SERVER_MODE              wsgi (по умолчанию) или asgi — uvicorn-воркеры
+                             на foodgram_backend.asgi
+    GUNICORN_WORKER_CLASS    sync, gthread (по умолчанию) или gevent;
+                             в режиме asgi не используется
+    GUNICORN_WORKERS         число процессов; по умолчанию от числа CPU
+    GUNICORN_THREADS         потоков в процессе gthread (4)
+    GUNICORN_CONNECTIONS     одновременных запросов в процессе gevent
+                             (1000)
+    GUNICORN_PRELOAD         True — приложение импортируется до fork
+    GUNICORN_MAX_REQUESTS    перезапуск процесса после стольких запросов
+                             (1000, 0 — не перезапускать)
+    GUNICORN_TIMEOUT         секунд на запрос до перезапуска процесса (30)
+    GUNICORN_SLOW_REQUEST_MS запросы дольше пишутся в лог (1000)
+
+Каждый поток gthread и каждый запрос gevent держит своё соединение с
+PostgreSQL: процессов × потоков не должно быть больше max_connections,
+иначе нужен PgBouncer (DB_POOL_MODE=pgbouncer).
+"""
+
+import multiprocessing
+import os
+import time
+
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi").lower()
+WORKER_CLASS = os.getenv("GUNICORN_WORKER_CLASS", "gthread").lower()
+if WORKER_CLASS not in ("sync", "gthread", "gevent"):
+    raise RuntimeError(
+        f"Неизвестный GUNICORN_WORKER_CLASS: {WORKER_CLASS}. "
+        "Допустимо: sync, gthread, gevent."
+    )
+
+CPUS = multiprocessing.cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:9000")
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "foodgram_backend.asgi"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "foodgram_backend.wsgi"
+    worker_class = WORKER_CLASS
+
+# синхронный процесс простаивает, пока ждёт БД, поэтому их больше, чем
+# CPU; потокам и корутинам хватает процесса на ядро
+if worker_class == "sync":
+    default_workers = CPUS * 2 + 1
+else:
+    default_workers = CPUS + 1
+workers = int(os.getenv("GUNICORN_WORKERS", default_workers))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_connections = int(os.getenv("GUNICORN_CONNECTIONS", "1000"))
+
+# общий импорт до fork: код и справочники в памяти делятся между
+# процессами (copy-on-write). gevent подменяет модули стандартной
+# библиотеки в процессе после fork, и импортированный до этого код
+# остался бы с блокирующими сокетами, поэтому для gevent выключено
+preload_app = (
+    os.getenv("GUNICORN_PRELOAD", str(worker_class != "gevent")) == "True"
+)
+
+# перезапуск процессов ограничивает рост памяти; jitter разносит
+# перезапуски, чтобы процессы не уходили одновременно
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = timeout
+# nginx держит соединения с backend открытыми
+keepalive = 5
+
+SLOW_REQUEST_MS = float(os.getenv("GUNICORN_SLOW_REQUEST_MS", "1000"))
+
+if SERVER_MODE == "asgi" or worker_class == "gevent":
+    # постоянное соединение принадлежит запросу-гринлету (gevent) или
+    # потоку, в котором Django ASGI выполнил синхронный код запроса, и
+    # после запроса никем не переиспользуется — такие соединения только
+    # копились бы до CONN_MAX_AGE
+    os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        # соединения, открытые при импорте, не делятся между процессами
+        from django.db import connections
+
+        connections.close_all()
+    if server.cfg.worker_class_str == "gevent":
+        # psycopg2 ждёт ответа БД, не блокируя остальные гринлеты
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+
+
+# хуки вызываются воркерами sync, gthread и gevent; uvicorn разбирает
+# HTTP сам и их не вызывает
+
+
+def pre_request(worker, req):
+    req.started = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):
+    duration = (time.perf_counter() - req.started) * 1000
+    if duration >= SLOW_REQUEST_MS:
+        worker.log.warning(
+            "Медленный запрос: %s %s — %s за %.0f мс",
+            req.method, req.uri, resp.status, duration,
+        )
+    else:
+        worker.log.debug(
+            "%s %s — %s за %.1f мс",
+            req.method, req.uri, resp.status, duration,
+        )
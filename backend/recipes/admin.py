@@ -1,7 +1,12 @@
 from django.contrib import admin
-from django.db.models import Count
 
-from .models import Ingredient, Recipe, RecipeIngredientAmount, Tag
+from .models import (
+    BackgroundTask,
+    Ingredient,
+    Recipe,
+    RecipeIngredientAmount,
+    Tag,
+)
 
 
 class IngredientInline(admin.TabularInline):
@@ -16,14 +21,6 @@ class RecipesAdmin(admin.ModelAdmin):
     search_fields = ("name", "author__username")
     inlines = [IngredientInline]
 
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(favorited_count=Count("favorited"))
-
-    @admin.display(description="В избранном", ordering="favorited_count")
-    def favorites_count(self, obj):
-        return obj.favorited_count
-
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
@@ -48,3 +45,10 @@ class IngredientAdmin(admin.ModelAdmin):
             },
         ),
     )
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_after")
+    list_filter = ("status", "name")
+    readonly_fields = ("created_at", "updated_at")
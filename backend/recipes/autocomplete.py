@@ -0,0 +1,50 @@
+from bisect import bisect_left
+from collections import namedtuple
+
+IndexEntry = namedtuple("IndexEntry", "key id name measurement_unit")
+
+
+def normalize(value):
+    return value.strip().casefold().replace("ё", "е")
+
+
+class IngredientIndex:
+    """
+    Отсортированный по нормализованному имени список ингредиентов.
+    Префикс ищется бинарным поиском, подстрока — линейным проходом.
+    """
+
+    def __init__(self, rows, version=None):
+        self.entries = sorted(
+            IndexEntry(normalize(name), pk, name, unit)
+            for pk, name, unit in rows
+        )
+        self.keys = [entry.key for entry in self.entries]
+        self.version = version
+
+    def __len__(self):
+        return len(self.entries)
+
+    def prefix_range(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\U0010ffff", lo=start)
+        return start, end
+
+    def search(self, query, limit):
+        """Сначала точное совпадение, затем префикс, затем подстрока."""
+        query = normalize(query)
+        if not query:
+            return self.entries[:limit]
+        start, end = self.prefix_range(query)
+        exact = []
+        prefix = []
+        for entry in self.entries[start:end]:
+            (exact if entry.key == query else prefix).append(entry)
+        found = exact + prefix
+        if len(found) < limit:
+            found += [
+                entry
+                for entry in self.entries
+                if query in entry.key and not entry.key.startswith(query)
+            ]
+        return found[:limit]
@@ -0,0 +1,136 @@
+"""
+Инкрементальное обновление ShoppingCartTotal.
+
+Все функции принимают id рецепта и, необязательно, id пользователя;
+без пользователя изменение применяется ко всем корзинам, где лежит
+рецепт. Таблицы обновляются одним SQL-запросом (PostgreSQL, ON CONFLICT).
+"""
+
+from django.db import connection, transaction
+
+from .models import RecipeIngredientAmount, ShoppingCart, ShoppingCartTotal
+
+TOTALS = ShoppingCartTotal._meta.db_table
+AMOUNTS = RecipeIngredientAmount._meta.db_table
+CART = ShoppingCart._meta.db_table
+
+
+def _users_sql(recipe_id, user_id):
+    if user_id is not None:
+        return "SELECT %s AS user_id", [user_id]
+    return f"SELECT user_id FROM {CART} WHERE recipe_id = %s", [recipe_id]
+
+
+def add_recipe(recipe_id, user_id=None):
+    """Прибавляет ингредиенты рецепта к итогам корзин."""
+    users_sql, users_params = _users_sql(recipe_id, user_id)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {TOTALS} (user_id, ingredient_id, total)
+            SELECT u.user_id, a.ingredient_id, a.amount
+            FROM {AMOUNTS} a CROSS JOIN ({users_sql}) u
+            WHERE a.recipe_id = %s
+            ON CONFLICT (user_id, ingredient_id)
+            DO UPDATE SET total = {TOTALS}.total + EXCLUDED.total
+            """,
+            users_params + [recipe_id],
+        )
+
+
+def remove_recipe(recipe_id, user_id=None):
+    """
+    Вычитает ингредиенты рецепта из итогов корзин. Итог не опускается
+    ниже нуля, даже если успел разойтись с корзиной.
+    """
+    users_sql, users_params = _users_sql(recipe_id, user_id)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {TOTALS} t SET total = GREATEST(t.total - a.amount, 0)
+            FROM {AMOUNTS} a, ({users_sql}) u
+            WHERE a.recipe_id = %s
+              AND t.user_id = u.user_id
+              AND t.ingredient_id = a.ingredient_id
+            """,
+            users_params + [recipe_id],
+        )
+        cursor.execute(
+            f"""
+            DELETE FROM {TOTALS}
+            WHERE total <= 0 AND user_id IN ({users_sql})
+            """,
+            users_params,
+        )
+
+
+def refresh(recipe_id, ingredient_ids):
+    """
+    Пересчитывает заново итоги ингредиентов ingredient_ids во всех
+    корзинах, где лежит рецепт, — после правки его состава.
+    """
+    ingredient_ids = list(ingredient_ids)
+    users_sql = f"SELECT user_id FROM {CART} WHERE recipe_id = %s"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            DELETE FROM {TOTALS}
+            WHERE ingredient_id = ANY(%s) AND user_id IN ({users_sql})
+            """,
+            [ingredient_ids, recipe_id],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {TOTALS} (user_id, ingredient_id, total)
+            SELECT c.user_id, a.ingredient_id, SUM(a.amount)
+            FROM {CART} c JOIN {AMOUNTS} a ON a.recipe_id = c.recipe_id
+            WHERE a.ingredient_id = ANY(%s) AND c.user_id IN ({users_sql})
+            GROUP BY c.user_id, a.ingredient_id
+            ON CONFLICT (user_id, ingredient_id)
+            DO UPDATE SET total = EXCLUDED.total
+            """,
+            [ingredient_ids, recipe_id],
+        )
+
+
+EXPECTED_TOTALS_SQL = f"""
+    SELECT c.user_id, a.ingredient_id, SUM(a.amount) AS total
+    FROM {CART} c JOIN {AMOUNTS} a ON a.recipe_id = c.recipe_id
+    GROUP BY c.user_id, a.ingredient_id
+"""
+
+
+def find_drift():
+    """
+    Расхождения между сохранёнными и пересчитанными итогами:
+    список (user_id, ingredient_id, сохранено, ожидается).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT
+                COALESCE(t.user_id, e.user_id),
+                COALESCE(t.ingredient_id, e.ingredient_id),
+                t.total,
+                e.total
+            FROM {TOTALS} t
+            FULL OUTER JOIN ({EXPECTED_TOTALS_SQL}) e
+                ON e.user_id = t.user_id
+               AND e.ingredient_id = t.ingredient_id
+            WHERE t.total IS DISTINCT FROM e.total
+            ORDER BY 1, 2
+            """
+        )
+        return cursor.fetchall()
+
+
+@transaction.atomic
+def rebuild():
+    """Пересчитывает все итоги с нуля."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TOTALS}")
+        cursor.execute(
+            f"INSERT INTO {TOTALS} (user_id, ingredient_id, total) "
+            f"{EXPECTED_TOTALS_SQL}"
+        )
+        return cursor.rowcount
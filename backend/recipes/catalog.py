@@ -0,0 +1,95 @@
+"""
+Снимок справочников (теги и ингредиенты) в памяти процесса.
+Таблицы маленькие и меняются редко, поэтому вьюсеты и сериализаторы
+читают их отсюда. Снимок перестраивается, когда меняется общая версия
+справочников в кеше, — так изменения видят все воркеры. Если кеш не
+общий (CACHE_SHARED), снимок ещё и живёт не дольше LOCAL_CACHE_TTL.
+"""
+
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .autocomplete import IngredientIndex
+from .models import Ingredient, Tag
+from .versioning import catalog_version, invalidate_catalog
+
+
+class Catalog:
+    """Теги и ингредиенты по id и индекс автодополнения."""
+
+    models = {"tags": Tag, "ingredients": Ingredient}
+
+    def __init__(self, tags, ingredients, version=None):
+        self.tags = {tag.id: tag for tag in tags}
+        self.ingredients = {
+            ingredient.id: ingredient for ingredient in ingredients
+        }
+        self.ingredient_index = IngredientIndex(
+            (
+                (ingredient.id, ingredient.name, ingredient.measurement_unit)
+                for ingredient in ingredients
+            ),
+            version=version,
+        )
+        self.version = version
+        self.built_at = time.monotonic()
+
+
+_catalog = None
+
+
+def _is_stale(catalog):
+    if catalog is None:
+        return True
+    if (
+        not settings.CACHE_SHARED
+        and time.monotonic() - catalog.built_at > settings.LOCAL_CACHE_TTL
+    ):
+        # версия в кеше процесса не знает об изменениях в других
+        # воркерах: новая версия меняет и ETag справочников
+        invalidate_catalog()
+        return True
+    return catalog.version != catalog_version()
+
+
+def build_catalog():
+    """Читает справочники из БД заново."""
+    global _catalog
+    version = catalog_version()
+    _catalog = Catalog(
+        list(Tag.objects.order_by("id")),
+        list(Ingredient.objects.order_by("id")),
+        version=version,
+    )
+    return _catalog
+
+
+def get_catalog():
+    """Снимок текущего процесса; перестраивается при смене версии."""
+    catalog = _catalog
+    if _is_stale(catalog):
+        catalog = build_catalog()
+    return catalog
+
+
+async def aget_catalog():
+    """get_catalog для асинхронных вьюх: БД читается только при сборке."""
+    catalog = _catalog
+    if _is_stale(catalog):
+        catalog = await sync_to_async(build_catalog)()
+    return catalog
+
+
+def resolve_ids(section, ids):
+    """
+    Объекты справочника по списку id одним проходом. Тех, кого нет
+    в снимке (версия ещё не обновилась), добирает один запрос in_bulk.
+    """
+    objects = getattr(get_catalog(), section)
+    found = {pk: objects[pk] for pk in ids if pk in objects}
+    missing = set(ids) - found.keys()
+    if missing:
+        found.update(Catalog.models[section].objects.in_bulk(missing))
+    return found
@@ -0,0 +1,74 @@
+"""
+Денормализованные счётчики рецептов и пользователей.
+
+change() обновляет счётчик одним UPDATE ... SET x = x + delta в той же
+транзакции, что и изменение связи; find_drift() и reconcile() сверяют
+и пересчитывают их по исходным таблицам.
+"""
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Subscription, User
+
+from .models import Favorite, Recipe, ShoppingCart
+
+# модель, счётчик, модель связи, внешний ключ связи на модель
+COUNTERS = (
+    (Recipe, "favorites_count", Favorite, "recipe"),
+    (Recipe, "cart_count", ShoppingCart, "recipe"),
+    (User, "recipes_count", Recipe, "author"),
+    (User, "followers_count", Subscription, "author"),
+    (User, "following_count", Subscription, "user"),
+)
+
+
+def change(model, pk, field, delta):
+    """Атомарно прибавляет delta к счётчику, не опуская его ниже нуля."""
+    objects = model.objects.filter(pk=pk)
+    if delta < 0:
+        objects = objects.filter(**{f"{field}__gte": -delta})
+    objects.update(**{field: F(field) + delta})
+
+
+def _actual(related_model, fk):
+    counts = (
+        related_model.objects.filter(**{fk: OuterRef("pk")})
+        .order_by()
+        .values(fk)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def find_drift():
+    """Список (модель, счётчик, id, сохранено, по факту)."""
+    drift = []
+    for model, field, related_model, fk in COUNTERS:
+        rows = (
+            model.objects.annotate(actual=_actual(related_model, fk))
+            .exclude(**{field: F("actual")})
+            .values_list("pk", field, "actual")
+        )
+        drift += [
+            (model.__name__, field, pk, stored, actual)
+            for pk, stored, actual in rows
+        ]
+    return drift
+
+
+def reconcile():
+    """Пересчитывает расходящиеся счётчики; возвращает число строк."""
+    fixed = 0
+    for model, field, related_model, fk in COUNTERS:
+        actual = _actual(related_model, fk)
+        ids = (
+            model.objects.annotate(actual=actual)
+            .exclude(**{field: F("actual")})
+            .values_list("pk", flat=True)
+        )
+        fixed += model.objects.filter(pk__in=ids).update(
+            **{field: actual}
+        )
+    return fixed
@@ -0,0 +1,217 @@
+"""
+Лента подписок (fan-out on write): рецепт при публикации одним
+INSERT ... SELECT добавляется в таблицу FeedEntry каждого подписчика
+автора, и чтение ленты — диапазон индекса feed_entry_timeline_key.
+
+Авторы, у которых подписчиков не меньше FEED_PULL_THRESHOLD, не
+рассылаются (рассылка писала бы десятки тысяч строк на рецепт):
+их рецепты читаются при запросе по индексу recipe_author_latest_idx
+и объединяются с записями ленты в том же запросе.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from users.models import Subscription
+
+from .models import FeedEntry, Recipe
+
+User = get_user_model()
+
+FEEDS = FeedEntry._meta.db_table
+RECIPES = Recipe._meta.db_table
+SUBSCRIPTIONS = Subscription._meta.db_table
+USERS = User._meta.db_table
+
+FAN_OUT_SQL = f"""
+INSERT INTO {FEEDS} (user_id, recipe_id, created_at)
+SELECT s.user_id, r.id, r.created_at
+FROM {RECIPES} r
+JOIN {USERS} u ON u.id = r.author_id
+JOIN {SUBSCRIPTIONS} s ON s.author_id = r.author_id
+WHERE r.id = %(recipe)s AND u.followers_count < %(threshold)s
+ON CONFLICT DO NOTHING
+"""
+
+FOLLOW_SQL = f"""
+INSERT INTO {FEEDS} (user_id, recipe_id, created_at)
+SELECT %(user)s, r.id, r.created_at
+FROM {RECIPES} r
+WHERE r.author_id = %(author)s
+ORDER BY r.created_at DESC, r.id DESC
+LIMIT %(limit)s
+ON CONFLICT DO NOTHING
+"""
+
+REBUILD_SQL = f"""
+INSERT INTO {FEEDS} (user_id, recipe_id, created_at)
+SELECT s.user_id, latest.id, latest.created_at
+FROM {SUBSCRIPTIONS} s
+JOIN {USERS} u ON u.id = s.author_id
+CROSS JOIN LATERAL (
+    SELECT r.id, r.created_at FROM {RECIPES} r
+    WHERE r.author_id = s.author_id
+    ORDER BY r.created_at DESC, r.id DESC
+    LIMIT %(limit)s
+) latest
+WHERE u.followers_count < %(threshold)s
+ON CONFLICT DO NOTHING
+"""
+
+TRIM_SQL = f"""
+DELETE FROM {FEEDS} WHERE id IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (
+            PARTITION BY user_id ORDER BY created_at DESC, recipe_id DESC
+        ) AS position
+        FROM {FEEDS}
+    ) ranked
+    WHERE position > %(limit)s
+)
+"""
+
+# обрезка лент выбранных пользователей: по индексу ленты находится
+# запись на позиции FEED_TIMELINE_SIZE + 1, удаляется она и всё старше
+TRIM_USERS_SQL = f"""
+DELETE FROM {FEEDS} f
+USING (
+    SELECT u.user_id, cutoff.created_at, cutoff.recipe_id
+    FROM ({{users}}) u
+    CROSS JOIN LATERAL (
+        SELECT e.created_at, e.recipe_id FROM {FEEDS} e
+        WHERE e.user_id = u.user_id
+        ORDER BY e.created_at DESC, e.recipe_id DESC
+        OFFSET %(limit)s LIMIT 1
+    ) cutoff
+) c
+WHERE f.user_id = c.user_id
+    AND (f.created_at, f.recipe_id) <= (c.created_at, c.recipe_id)
+"""
+
+FOLLOWERS_SQL = f"""
+SELECT s.user_id FROM {SUBSCRIPTIONS} s
+JOIN {RECIPES} r ON r.author_id = s.author_id
+WHERE r.id = %(recipe)s
+"""
+
+# записи ленты и рецепты авторов выше порога рассылки; UNION убирает
+# рецепты, попавшие в ленту до того, как автор перешёл порог
+TIMELINE_SQL = f"""
+(
+    SELECT f.created_at, f.recipe_id FROM {FEEDS} f
+    WHERE f.user_id = %(user)s {{feed_before}}
+    ORDER BY f.created_at DESC, f.recipe_id DESC
+    LIMIT %(limit)s
+)
+UNION
+(
+    SELECT r.created_at, r.id FROM {USERS} u
+    JOIN {SUBSCRIPTIONS} s ON s.author_id = u.id AND s.user_id = %(user)s
+    JOIN {RECIPES} r ON r.author_id = u.id
+    WHERE u.followers_count >= %(threshold)s {{recipe_before}}
+    ORDER BY r.created_at DESC, r.id DESC
+    LIMIT %(limit)s
+)
+ORDER BY 1 DESC, 2 DESC
+LIMIT %(limit)s
+"""
+
+BEFORE_SQL = "AND ({table}.created_at, {table}.{pk}) < (%(created_at)s, %(pk)s)"
+
+
+def _execute(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def fan_out(recipe_id):
+    """
+    Добавляет рецепт в ленты подписчиков и обрезает их до
+    FEED_TIMELINE_SIZE; возвращает число добавленных записей.
+    """
+    added = _execute(FAN_OUT_SQL, {
+        "recipe": recipe_id,
+        "threshold": settings.FEED_PULL_THRESHOLD,
+    })
+    if added:
+        _execute(TRIM_USERS_SQL.format(users=FOLLOWERS_SQL), {
+            "recipe": recipe_id,
+            "limit": settings.FEED_TIMELINE_SIZE,
+        })
+    return added
+
+
+def follow(user_id, author_id):
+    """Новая подписка: последние рецепты автора попадают в ленту."""
+    pulled = User.objects.filter(
+        pk=author_id, followers_count__gte=settings.FEED_PULL_THRESHOLD
+    )
+    if pulled.exists():
+        return 0
+    params = {
+        "user": user_id,
+        "author": author_id,
+        "limit": settings.FEED_TIMELINE_SIZE,
+    }
+    added = _execute(FOLLOW_SQL, params)
+    if added:
+        _execute(
+            TRIM_USERS_SQL.format(users="SELECT %(user)s AS user_id"), params
+        )
+    return added
+
+
+def unfollow(user_id, author_id):
+    """Отписка: рецепты автора убираются из ленты."""
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def trim():
+    """
+    Оставляет в каждой ленте FEED_TIMELINE_SIZE последних записей.
+    Рассылка и подписка обрезают ленты сами; общая обрезка нужна
+    после уменьшения FEED_TIMELINE_SIZE.
+    """
+    return _execute(TRIM_SQL, {"limit": settings.FEED_TIMELINE_SIZE})
+
+
+def rebuild():
+    """
+    Заполняет ленты заново по подпискам. Нужна после изменения
+    FEED_PULL_THRESHOLD или FEED_TIMELINE_SIZE и когда автор перешёл
+    порог рассылки.
+    """
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        _execute(REBUILD_SQL, {
+            "limit": settings.FEED_TIMELINE_SIZE,
+            "threshold": settings.FEED_PULL_THRESHOLD,
+        })
+        return trim()
+
+
+def timeline(user, limit, position=None):
+    """
+    id рецептов ленты пользователя, новые первыми, не больше limit.
+    position — (created_at, id) последнего рецепта предыдущей страницы.
+    """
+    params = {
+        "user": user.pk,
+        "limit": limit,
+        "threshold": settings.FEED_PULL_THRESHOLD,
+    }
+    if position is None:
+        sql = TIMELINE_SQL.format(feed_before="", recipe_before="")
+    else:
+        params["created_at"], params["pk"] = position
+        sql = TIMELINE_SQL.format(
+            feed_before=BEFORE_SQL.format(table="f", pk="recipe_id"),
+            recipe_before=BEFORE_SQL.format(table="r", pk="id"),
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [pk for _, pk in cursor.fetchall()]
@@ -0,0 +1,76 @@
+"""
+Обработка загружаемых изображений: проверка размеров, поворот по EXIF,
+перекодирование без метаданных и миниатюры фиксированного размера.
+"""
+
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+
+
+class InvalidImage(ValueError):
+    """Изображение не подходит по размерам."""
+
+
+def _open(file):
+    file.seek(0)
+    try:
+        return Image.open(file)
+    except Image.DecompressionBombError:
+        raise InvalidImage("Слишком большое изображение.")
+
+
+def check_image(file):
+    """Проверка размеров по заголовку файла, без декодирования."""
+    width, height = _open(file).size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise InvalidImage(
+            f"Слишком большое изображение: {width}×{height} px."
+        )
+    if min(width, height) < settings.IMAGE_MIN_SIDE:
+        raise InvalidImage(
+            "Сторона изображения должна быть не меньше "
+            f"{settings.IMAGE_MIN_SIDE} px."
+        )
+
+
+def _encode(image, name):
+    """Кодирует в IMAGE_FORMAT; EXIF и прочие метаданные не сохраняются."""
+    fmt = settings.IMAGE_FORMAT
+    has_alpha = image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    if fmt == "JPEG" and has_alpha:
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    buffer = BytesIO()
+    image.save(
+        buffer, fmt, quality=settings.IMAGE_QUALITY, optimize=True
+    )
+    return ContentFile(buffer.getvalue(), name=f"{name}.{EXTENSIONS[fmt]}")
+
+
+def optimize_image(file):
+    """Уменьшает до IMAGE_MAX_SIDE по длинной стороне и перекодирует."""
+    check_image(file)
+    # поворот по EXIF до того, как метаданные будут отброшены
+    image = ImageOps.exif_transpose(_open(file))
+    image.thumbnail(
+        (settings.IMAGE_MAX_SIDE, settings.IMAGE_MAX_SIDE),
+        Image.LANCZOS,
+    )
+    return _encode(image, "image")
+
+
+def make_thumbnail(file, size):
+    """Миниатюра ровно size (ширина, высота) с обрезкой по центру."""
+    image = ImageOps.exif_transpose(_open(file))
+    image = ImageOps.fit(image, size, Image.LANCZOS)
+    return _encode(image, "thumb")
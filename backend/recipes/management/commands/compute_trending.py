@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.caching import invalidate_recipe_responses
+from recipes.ranking import compute_trending
+
+
+class Command(BaseCommand):
+    help = "Пересчитать популярность рецептов для ?ordering=trending"
+
+    def handle(self, *args, **kwargs):
+        started = time.perf_counter()
+        updated = compute_trending()
+        elapsed = (time.perf_counter() - started) * 1000
+        if updated:
+            # порядок ленты изменился — закешированные ответы и ETag устарели
+            invalidate_recipe_responses()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Обновлено рецептов: {updated} за {elapsed:.1f} мс"
+        ))
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from recipes.images import make_thumbnail
+from recipes.models import Recipe
+
+User = get_user_model()
+
+SOURCES = (
+    (Recipe, "image", "image_thumb", "RECIPE_THUMB_SIZE"),
+    (User, "avatar", "avatar_thumb", "AVATAR_THUMB_SIZE"),
+)
+
+
+class Command(BaseCommand):
+    help = "Создать недостающие миниатюры рецептов и аватаров"
+
+    def handle(self, *args, **kwargs):
+        for model, source, target, size_setting in SOURCES:
+            size = getattr(settings, size_setting)
+            objects = model.objects.filter(**{target: ""}).exclude(
+                **{source: ""}
+            )
+            created = 0
+            for obj in objects.iterator():
+                image = getattr(obj, source)
+                try:
+                    with image.open("rb"):
+                        thumb = make_thumbnail(image, size)
+                except OSError as error:
+                    self.stdout.write(self.style.WARNING(
+                        f"⚠️ {model.__name__} id={obj.pk}: {error}"
+                    ))
+                    continue
+                getattr(obj, target).save(thumb.name, thumb, save=False)
+                obj.save(update_fields=[target])
+                created += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {model._meta.verbose_name_plural}: "
+                f"создано миниатюр {created}"
+            ))
@@ -1,54 +1,137 @@
 import csv
+import json
+import time
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
 from recipes.models import Ingredient
+from recipes.versioning import invalidate_catalog
+
+DEFAULT_PATH = "/app/data/ingredients.csv"
 
 
 class Command(BaseCommand):
-    help = "Загрузить ингредиенты из CSV-файла"
+    help = "Загрузить ингредиенты из CSV- или JSON-файла"
 
-    def handle(self, *args, **kwargs):
-        filepath = Path("/app/data/ingredients.csv")
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=DEFAULT_PATH,
+            help=f"Путь к ingredients.csv или ingredients.json "
+                 f"(по умолчанию {DEFAULT_PATH})",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Размер пачки для bulk_create",
+        )
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Загрузка CSV через COPY PostgreSQL (для больших файлов)",
+        )
 
-        filepath = filepath.resolve()
+    def handle(self, *args, **options):
+        filepath = Path(options["path"]).resolve()
+        if not filepath.exists():
+            raise CommandError(f"❌ Файл не найден: {filepath}")
         self.stdout.write(f"Загружаем ингредиенты из: {filepath}")
 
-        count = 0
-        errors = 0
-
-        try:
-            with open(filepath, encoding="utf-8") as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if not row:
-                        continue
-                    line = row[0].strip()
-                    if "," not in line:
-                        name = line
-                        unit = ""
-                    else:
-                        name, unit = map(str.strip, line.split(",", 1))
-                    if not name:
-                        self.stderr.write(
-                            f"❗ Пустое имя ингредиента: {repr(line)}"
-                        )
-                        errors += 1
-                        continue
-                    obj, created = Ingredient.objects.get_or_create(
-                        name=name, measurement_unit=unit
-                    )
-                    if created:
-                        count += 1
+        started = time.perf_counter()
+        before = Ingredient.objects.count()
+        if options["copy"]:
+            processed, errors = self.load_with_copy(filepath)
+        else:
+            processed, errors = self.load_with_bulk_create(
+                filepath, options["batch_size"]
+            )
+        created = Ingredient.objects.count() - before
+        elapsed = time.perf_counter() - started
+        invalidate_catalog()
 
-        except FileNotFoundError:
-            self.stderr.write(f"❌ Файл не найден: {filepath}")
-            return
+        rate = processed / elapsed if elapsed else processed
         self.stdout.write(self.style.SUCCESS(
-            f"✅ Загружено ингредиентов: {count}")
-        )
+            f"✅ Загружено ингредиентов: {created} "
+            f"(обработано строк: {processed}, {elapsed:.2f} с, "
+            f"{rate:.0f} строк/с)"
+        ))
         if errors:
             self.stderr.write(
                 self.style.WARNING(f"⚠️ Пропущено строк: {errors}")
             )
+
+    def read_rows(self, filepath):
+        """Пары (название, единица) из CSV или JSON."""
+        with open(filepath, encoding="utf-8") as f:
+            if filepath.suffix.lower() == ".json":
+                for item in json.load(f):
+                    yield item.get("name", ""), item.get(
+                        "measurement_unit", ""
+                    )
+                return
+            for row in csv.reader(f):
+                if row:
+                    yield row[0], row[1] if len(row) > 1 else ""
+
+    def load_with_bulk_create(self, filepath, batch_size):
+        seen = set()
+        processed = errors = 0
+        for name, unit in self.read_rows(filepath):
+            processed += 1
+            name, unit = name.strip(), unit.strip()
+            if not name:
+                self.stderr.write(
+                    f"❗ Пустое имя ингредиента: {(name, unit)!r}"
+                )
+                errors += 1
+                continue
+            seen.add((name, unit))
+
+        ingredients = [
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in sorted(seen)
+        ]
+        # дубликаты в БД отсекает unique_ingredient_constraint
+        Ingredient.objects.bulk_create(
+            ingredients, batch_size=batch_size, ignore_conflicts=True
+        )
+        return processed, errors
+
+    def load_with_copy(self, filepath):
+        if connection.vendor != "postgresql":
+            raise CommandError("--copy доступен только для PostgreSQL")
+        if filepath.suffix.lower() != ".csv":
+            raise CommandError("--copy поддерживает только CSV")
+        table = Ingredient._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE ingredient_load "
+                "(name text, measurement_unit text) ON COMMIT DROP"
+            )
+            with open(filepath, encoding="utf-8") as f:
+                cursor.copy_expert(
+                    "COPY ingredient_load FROM STDIN WITH (FORMAT csv)", f
+                )
+            cursor.execute("SELECT count(*) FROM ingredient_load")
+            processed = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT count(*) FROM ingredient_load "
+                "WHERE coalesce(trim(name), '') = ''"
+            )
+            errors = cursor.fetchone()[0]
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (name, measurement_unit)
+                SELECT DISTINCT
+                    trim(name), coalesce(trim(measurement_unit), '')
+                FROM ingredient_load
+                WHERE coalesce(trim(name), '') <> ''
+                ON CONFLICT ON CONSTRAINT unique_ingredient_constraint
+                DO NOTHING
+                """
+            )
+        return processed, errors
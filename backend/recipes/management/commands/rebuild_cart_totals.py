@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import cart_totals
+
+
+class Command(BaseCommand):
+    help = "Проверить и пересчитать итоги списков покупок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Только показать расхождения, ничего не меняя",
+        )
+
+    def handle(self, *args, **options):
+        drift = cart_totals.find_drift()
+        for user_id, ingredient_id, stored, expected in drift[:20]:
+            self.stdout.write(
+                f"user={user_id} ingredient={ingredient_id}: "
+                f"сохранено {stored}, ожидается {expected}"
+            )
+        if options["verify"]:
+            if drift:
+                raise CommandError(f"Расхождений: {len(drift)}")
+            self.stdout.write(self.style.SUCCESS("✅ Итоги совпадают"))
+            return
+        rows = cart_totals.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Исправлено расхождений: {len(drift)}, строк итогов: {rows}"
+        ))
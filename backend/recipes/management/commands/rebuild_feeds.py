@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes import feeds
+
+
+class Command(BaseCommand):
+    help = "Заполнить ленты подписок заново или обрезать их (--trim)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--trim",
+            action="store_true",
+            help="Только удалить записи сверх FEED_TIMELINE_SIZE",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["trim"]:
+            deleted = feeds.trim()
+            message = f"Удалено записей лент: {deleted}"
+        else:
+            feeds.rebuild()
+            message = "Ленты подписок заполнены заново"
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {message} за {elapsed:.1f} мс"
+        ))
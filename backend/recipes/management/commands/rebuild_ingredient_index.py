@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.catalog import build_catalog
+from recipes.versioning import invalidate_catalog
+
+
+class Command(BaseCommand):
+    help = "Перестроить снимок справочников и индекс автодополнения"
+
+    def handle(self, *args, **kwargs):
+        invalidate_catalog()
+        started = time.perf_counter()
+        catalog = build_catalog()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Тегов: {len(catalog.tags)}, "
+            f"ингредиентов: {len(catalog.ingredients)} "
+            f"за {elapsed:.1f} мс"
+        ))
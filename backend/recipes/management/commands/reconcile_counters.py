@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import counters
+
+
+class Command(BaseCommand):
+    help = "Проверить и пересчитать счётчики рецептов и пользователей"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Только показать расхождения, ничего не меняя",
+        )
+
+    def handle(self, *args, **options):
+        drift = counters.find_drift()
+        for model, field, pk, stored, actual in drift[:20]:
+            self.stdout.write(
+                f"{model} id={pk} {field}: "
+                f"сохранено {stored}, по факту {actual}"
+            )
+        if options["verify"]:
+            if drift:
+                raise CommandError(f"Расхождений: {len(drift)}")
+            self.stdout.write(self.style.SUCCESS("✅ Счётчики совпадают"))
+            return
+        fixed = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Исправлено счётчиков: {fixed}"
+        ))
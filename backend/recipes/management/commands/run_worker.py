@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes import queue
+
+
+class Command(BaseCommand):
+    help = "Выполнять задачи фоновой очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить готовые задачи и завершиться",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10,
+            help="Сколько задач забирать за раз",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Пауза (сек) при пустой очереди",
+        )
+
+    def handle(self, *args, **options):
+        requeued = queue.requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Возвращено в очередь брошенных задач: {requeued}"
+            ))
+        while True:
+            # как между запросами: соединение старше CONN_MAX_AGE или
+            # не прошедшее проверку открывается заново
+            close_old_connections()
+            for name, error in queue.run_periodic():
+                self.report_periodic(name, error)
+            tasks = queue.claim(options["batch_size"])
+            if not tasks:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                queue.requeue_stale()
+                continue
+            for background_task in tasks:
+                self.report(queue.run(background_task))
+
+    def report(self, background_task):
+        status = queue.Status
+        if background_task.status == status.DONE:
+            self.stdout.write(self.style.SUCCESS(f"✅ {background_task}"))
+        elif background_task.status == status.PENDING:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {background_task}: повтор после "
+                f"{background_task.run_after:%H:%M:%S} — "
+                f"{background_task.last_error}"
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f"❌ {background_task}: {background_task.last_error}"
+            ))
+
+    def report_periodic(self, name, error):
+        if error:
+            self.stdout.write(self.style.ERROR(f"❌ {name}: {error}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {name}"))
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.23 on 2026-10-17 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="recipe_feed_keyset_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+FILL_TOTALS = """
+INSERT INTO recipes_shoppingcarttotal (user_id, ingredient_id, total)
+SELECT c.user_id, a.ingredient_id, SUM(a.amount)
+FROM recipes_shoppingcart c
+JOIN recipes_recipeingredientamount a ON a.recipe_id = c.recipe_id
+GROUP BY c.user_id, a.ingredient_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0003_recipe_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoppingCartTotal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total", models.PositiveIntegerField(verbose_name="Количество")),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipes.ingredient",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_cart_totals",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Итог списка покупок",
+                "verbose_name_plural": "Итоги списков покупок",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="shoppingcarttotal",
+            constraint=models.UniqueConstraint(
+                fields=("user", "ingredient"), name="unique_user_cart_total"
+            ),
+        ),
+        migrations.RunSQL(FILL_TOTALS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_shoppingcarttotal"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Дата изменения"),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["updated_at"], name="recipe_updated_at_idx"),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0005_recipe_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_thumb",
+            field=models.ImageField(
+                blank=True,
+                default="",
+                editable=False,
+                upload_to="recipe_images/thumbs/",
+                verbose_name="Миниатюра изображения",
+            ),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_recipe_image_thumb"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "В обработке"),
+                    ("ready", "Готово"),
+                    ("failed", "Ошибка"),
+                ],
+                default="ready",
+                editable=False,
+                max_length=16,
+                verbose_name="Обработка изображения",
+            ),
+        ),
+        migrations.CreateModel(
+            name="BackgroundTask",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200, verbose_name="Задача")),
+                ("payload", models.JSONField(default=dict, verbose_name="Аргументы")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Ожидает"),
+                            ("running", "Выполняется"),
+                            ("done", "Выполнена"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="Попыток"),
+                ),
+                (
+                    "run_after",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Запустить не раньше",
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Ошибка")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Фоновая задача",
+                "verbose_name_plural": "Фоновые задачи",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "pending")),
+                        fields=["run_after"],
+                        name="background_task_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+FILL_COUNTERS = """
+UPDATE recipes_recipe r SET
+    favorites_count = (
+        SELECT COUNT(*) FROM recipes_favorite f WHERE f.recipe_id = r.id
+    ),
+    cart_count = (
+        SELECT COUNT(*) FROM recipes_shoppingcart c WHERE c.recipe_id = r.id
+    );
+UPDATE users_user u SET
+    recipes_count = (
+        SELECT COUNT(*) FROM recipes_recipe r WHERE r.author_id = u.id
+    ),
+    followers_count = (
+        SELECT COUNT(*) FROM users_subscription s WHERE s.author_id = u.id
+    ),
+    following_count = (
+        SELECT COUNT(*) FROM users_subscription s WHERE s.user_id = u.id
+    );
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_recipe_image_status_backgroundtask"),
+        ("users", "0004_user_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="cart_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В корзинах"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В избранном"
+            ),
+        ),
+        migrations.RunSQL(FILL_COUNTERS, migrations.RunSQL.noop),
+    ]
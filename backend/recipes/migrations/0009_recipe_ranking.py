@@ -0,0 +1,65 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:25
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# Счётчики и trending_score обновляются часто; tsvector нужно
+# пересчитывать только при изменении name и text.
+SEARCH_VECTOR_TRIGGER_ON_TEXT = """
+DROP TRIGGER recipes_recipe_search_vector_trigger ON recipes_recipe;
+CREATE TRIGGER recipes_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe
+    FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector_update();
+"""
+
+SEARCH_VECTOR_TRIGGER_ON_ANY = """
+DROP TRIGGER recipes_recipe_search_vector_trigger ON recipes_recipe;
+CREATE TRIGGER recipes_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON recipes_recipe
+    FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("recipes", "0008_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="trending_score",
+            field=models.FloatField(
+                default=0, editable=False, verbose_name="Популярность сейчас"
+            ),
+        ),
+        migrations.RunSQL(
+            SEARCH_VECTOR_TRIGGER_ON_TEXT, SEARCH_VECTOR_TRIGGER_ON_ANY
+        ),
+        AddIndexConcurrently(
+            model_name="favorite",
+            index=models.Index(fields=["added_at"], name="favorite_added_at_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-favorites_count", "-created_at", "-id"],
+                name="recipe_popular_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-trending_score", "-created_at", "-id"],
+                name="recipe_trending_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="shoppingcart",
+            index=models.Index(fields=["added_at"], name="cart_added_at_idx"),
+        ),
+    ]
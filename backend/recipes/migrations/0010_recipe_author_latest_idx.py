@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:27
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("recipes", "0009_recipe_ranking"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-created_at", "-id"],
+                name="recipe_author_latest_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import migrations
+
+# как recipes.feeds.REBUILD_SQL с обрезкой до FEED_TIMELINE_SIZE: ленты
+# существующих подписок, без авторов выше порога рассылки
+FILL_FEEDS = """
+INSERT INTO recipes_feedentry (user_id, recipe_id, created_at)
+SELECT user_id, recipe_id, created_at FROM (
+    SELECT s.user_id, latest.id AS recipe_id, latest.created_at,
+        row_number() OVER (
+            PARTITION BY s.user_id
+            ORDER BY latest.created_at DESC, latest.id DESC
+        ) AS position
+    FROM users_subscription s
+    JOIN users_user u ON u.id = s.author_id
+    CROSS JOIN LATERAL (
+        SELECT r.id, r.created_at FROM recipes_recipe r
+        WHERE r.author_id = s.author_id
+        ORDER BY r.created_at DESC, r.id DESC
+        LIMIT %(limit)s
+    ) latest
+    WHERE u.followers_count < %(threshold)s
+) ranked
+WHERE position <= %(limit)s
+ON CONFLICT DO NOTHING
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0011_feedentry"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [(
+                FILL_FEEDS,
+                {
+                    "limit": settings.FEED_TIMELINE_SIZE,
+                    "threshold": settings.FEED_PULL_THRESHOLD,
+                },
+            )],
+            migrations.RunSQL.noop,
+        ),
+    ]
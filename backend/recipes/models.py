@@ -1,10 +1,41 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+    TrigramWordSimilarity,
+)
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import Exists, OuterRef
+from django.db.models import Exists, F, OuterRef, Prefetch, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
 
 MAX_LENGTH = 200
 MAX_RECIPE_NAME_LENGTH = 100
+SEARCH_CONFIG = "russian"
+
+# последние рецепты каждого автора: LIMIT внутри LATERAL читает
+# не больше limit строк индекса recipe_author_latest_idx на автора
+LATEST_BY_AUTHOR_SQL = """
+SELECT latest.id
+FROM unnest(%s::bigint[]) AS author(id)
+CROSS JOIN LATERAL (
+    SELECT r.id FROM recipes_recipe r
+    WHERE r.author_id = author.id
+    ORDER BY r.created_at DESC, r.id DESC
+    LIMIT %s
+) latest
+"""
+
+
+class ImageStatus(models.TextChoices):
+    """Состояние фоновой обработки загруженного изображения."""
+
+    PENDING = "pending", "В обработке"
+    READY = "ready", "Готово"
+    FAILED = "failed", "Ошибка"
 
 
 class RecipeQuerySet(models.QuerySet):
@@ -18,6 +49,55 @@ class RecipeQuerySet(models.QuerySet):
             is_in_shopping_cart=Exists(
                 user.shopping_cart_recipes.filter(id=OuterRef("id"))
             ),
+            is_author_subscribed=Exists(
+                user.subscriptions.filter(author=OuterRef("author"))
+            ),
+        )
+
+    def search(self, value):
+        """
+        Полнотекстовый поиск по названию и описанию плюс нечёткое
+        совпадение названия по триграммам; сортировка по релевантности.
+        """
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        return (
+            self.annotate(
+                search_rank=(
+                    SearchRank(F("search_vector"), query)
+                    + TrigramWordSimilarity(value, "name")
+                ),
+            )
+            .filter(
+                Q(search_vector=query) | Q(name__trigram_word_similar=value)
+            )
+            .order_by("-search_rank", "-created_at", "-id")
+        )
+
+    def latest_by_authors(self, author_ids, limit):
+        """Не больше limit последних рецептов каждого из авторов."""
+        author_ids = list(author_ids)
+        if not author_ids:
+            return self.none()
+        return self.filter(
+            pk__in=RawSQL(LATEST_BY_AUTHOR_SQL, (author_ids, limit))
+        ).order_by("-created_at", "-id")
+
+    def for_feed(self):
+        """Автор, теги и ингредиенты — фиксированным числом запросов."""
+        return (
+            self.defer("search_vector")
+            .select_related("author")
+            .prefetch_related(
+                "tags",
+                Prefetch(
+                    "recipeingredientamount_set",
+                    queryset=RecipeIngredientAmount.objects.select_related(
+                        "ingredient"
+                    ),
+                ),
+            )
         )
 
 
@@ -86,6 +166,38 @@ class Recipe(models.Model):
         upload_to="recipe_images/",
         verbose_name="Изображение рецепта",
     )
+    image_thumb = models.ImageField(
+        upload_to="recipe_images/thumbs/",
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Миниатюра изображения",
+    )
+    image_status = models.CharField(
+        max_length=16,
+        choices=ImageStatus.choices,
+        default=ImageStatus.READY,
+        editable=False,
+        verbose_name="Обработка изображения",
+    )
+    # счётчики обновляются через F() вместе с изменением связей,
+    # расхождения исправляет manage.py reconcile_counters
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В избранном",
+    )
+    cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В корзинах",
+    )
+    # пересчитывается периодически: manage.py compute_trending
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name="Популярность сейчас",
+    )
     text = models.TextField(
         verbose_name="Описание",
     )
@@ -105,17 +217,58 @@ class Recipe(models.Model):
         verbose_name="Время готовки (минуты)",
     )
 
+    # заполняется триггером БД из name (вес A) и text (вес B)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     objects = RecipeQuerySet.as_manager()
 
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Дата публикации"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
 
     class Meta:
         ordering = ["-created_at"]
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="recipe_feed_keyset_idx",
+            ),
+            # валидатор ETag ленты: Max(updated_at) читается из индекса
+            models.Index(
+                fields=["updated_at"],
+                name="recipe_updated_at_idx",
+            ),
+            # рецепты автора в подписках: latest_by_authors
+            models.Index(
+                fields=["author", "-created_at", "-id"],
+                name="recipe_author_latest_idx",
+            ),
+            # ?ordering=popular и ?ordering=trending
+            models.Index(
+                fields=["-favorites_count", "-created_at", "-id"],
+                name="recipe_popular_idx",
+            ),
+            models.Index(
+                fields=["-trending_score", "-created_at", "-id"],
+                name="recipe_trending_idx",
+            ),
+            GinIndex(
+                fields=["name"],
+                name="recipe_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["search_vector"],
+                name="recipe_search_vector_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -144,6 +297,10 @@ class Favorite(models.Model):
                 fields=["user", "recipe"], name="unique_user_favorite"
             )
         ]
+        # окно событий для compute_trending
+        indexes = [
+            models.Index(fields=["added_at"], name="favorite_added_at_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} → {self.recipe}"
@@ -172,6 +329,10 @@ class ShoppingCart(models.Model):
                 fields=["user", "recipe"], name="unique_user_shopping_cart"
             )
         ]
+        # окно событий для compute_trending
+        indexes = [
+            models.Index(fields=["added_at"], name="cart_added_at_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} → {self.recipe}"
@@ -203,3 +364,120 @@ class RecipeIngredientAmount(models.Model):
 
     def __str__(self):
         return f"{self.ingredient} – {self.amount} для {self.recipe}"
+
+
+class ShoppingCartTotal(models.Model):
+    """
+    Сумма ингредиента по всем рецептам в корзине пользователя.
+    Обновляется инкрементально при изменении корзины и рецептов.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="shopping_cart_totals",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    total = models.PositiveIntegerField(verbose_name="Количество")
+
+    class Meta:
+        verbose_name = "Итог списка покупок"
+        verbose_name_plural = "Итоги списков покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_user_cart_total"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} → {self.ingredient}: {self.total}"
+
+
+class FeedEntry(models.Model):
+    """
+    Рецепт в ленте подписок пользователя. Записи добавляются при
+    публикации рецепта (recipes.feeds), лента читается одним
+    диапазоном индекса по (user, created_at, recipe).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        # поиск по user покрывает feed_entry_timeline_key
+        db_index=False,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    # копия Recipe.created_at: сортировка без обращения к рецептам
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Запись ленты подписок"
+        verbose_name_plural = "Ленты подписок"
+        constraints = [
+            # индекс ключа читается в обратном порядке — новые первыми
+            models.UniqueConstraint(
+                fields=["user", "created_at", "recipe"],
+                name="feed_entry_timeline_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} ← {self.recipe}"
+
+
+class BackgroundTask(models.Model):
+    """
+    Задача фоновой очереди. Воркер (manage.py run_worker) забирает
+    готовые к запуску задачи и при ошибке откладывает повтор.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Ожидает"
+        RUNNING = "running", "Выполняется"
+        DONE = "done", "Выполнена"
+        FAILED = "failed", "Ошибка"
+
+    name = models.CharField(max_length=200, verbose_name="Задача")
+    payload = models.JSONField(default=dict, verbose_name="Аргументы")
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Попыток",
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Запустить не раньше",
+    )
+    last_error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            # воркер выбирает только ожидающие задачи
+            models.Index(
+                fields=["run_after"],
+                condition=Q(status="pending"),
+                name="background_task_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,175 @@
+"""
+Очередь фоновых задач поверх таблицы BackgroundTask, без внешнего
+брокера. Задача ставится после коммита транзакции, воркер
+(manage.py run_worker) забирает её через SELECT ... FOR UPDATE SKIP
+LOCKED, так что воркеров может быть несколько. При ошибке задача
+откладывается с растущей задержкой, после TASK_MAX_ATTEMPTS попыток
+помечается failed. С TASK_QUEUE_EAGER первая попытка выполняется сразу
+в процессе — для разработки и тестов без воркера.
+
+Периодические задачи (@periodic) воркер вызывает сам, не реже заданного
+интервала; при общем кеше интервал соблюдается для всех воркеров сразу.
+Выполненные задачи удаляются через TASK_KEEP_DONE секунд.
+"""
+
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundTask
+
+Status = BackgroundTask.Status
+
+# имя -> (функция, настройка с интервалом в секундах)
+PERIODIC = {}
+
+
+class PermanentError(Exception):
+    """Ошибка, после которой повторять задачу бессмысленно."""
+
+
+def task(on_failure=None):
+    """
+    Регистрирует функцию как фоновую задачу: func.delay(**kwargs)
+    ставит её в очередь. on_failure вызывается с теми же аргументами,
+    когда попытки закончились.
+    """
+
+    def decorator(func):
+        func.task_name = f"{func.__module__}.{func.__qualname__}"
+        func.on_failure = on_failure
+        func.delay = partial(enqueue, func.task_name)
+        return func
+
+    return decorator
+
+
+def periodic(interval_setting):
+    """
+    Регистрирует функцию, которую воркер вызывает раз в
+    settings.<interval_setting> секунд (0 — не вызывает).
+    """
+
+    def decorator(func):
+        PERIODIC[f"{func.__module__}.{func.__qualname__}"] = (
+            func, interval_setting
+        )
+        return func
+
+    return decorator
+
+
+def run_periodic():
+    """
+    Вызывает периодические задачи, чей интервал истёк; возвращает
+    список (имя, текст ошибки или None).
+    """
+    results = []
+    for name, (func, interval_setting) in PERIODIC.items():
+        interval = getattr(settings, interval_setting)
+        # ключ живёт interval секунд: пока он есть, задачу не повторяют
+        if not interval or not cache.add(f"queue:periodic:{name}", 1, interval):
+            continue
+        try:
+            func()
+        except Exception as error:
+            results.append((name, "".join(
+                traceback.format_exception_only(type(error), error)
+            ).strip()))
+        else:
+            results.append((name, None))
+    return results
+
+
+def enqueue(task_name, /, **payload):
+    def push():
+        background_task = BackgroundTask.objects.create(
+            name=task_name, payload=payload
+        )
+        if settings.TASK_QUEUE_EAGER:
+            claimed = claim(ids=[background_task.pk])
+            if claimed:
+                run(claimed[0])
+
+    transaction.on_commit(push)
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи упавших воркеров."""
+    deadline = timezone.now() - timedelta(
+        seconds=settings.TASK_STALE_TIMEOUT
+    )
+    return BackgroundTask.objects.filter(
+        status=Status.RUNNING, updated_at__lt=deadline
+    ).update(status=Status.PENDING, updated_at=timezone.now())
+
+
+def purge_done():
+    """Удаляет задачи, выполненные больше TASK_KEEP_DONE секунд назад."""
+    deadline = timezone.now() - timedelta(seconds=settings.TASK_KEEP_DONE)
+    deleted, _ = BackgroundTask.objects.filter(
+        status=Status.DONE, updated_at__lt=deadline
+    ).delete()
+    return deleted
+
+
+def claim(limit=1, ids=None):
+    """Забирает готовые к запуску задачи и помечает их running."""
+    with transaction.atomic():
+        tasks = BackgroundTask.objects.select_for_update(
+            skip_locked=True
+        ).filter(status=Status.PENDING, run_after__lte=timezone.now())
+        if ids is not None:
+            tasks = tasks.filter(pk__in=ids)
+        claimed = list(tasks.order_by("run_after")[:limit])
+        BackgroundTask.objects.filter(
+            pk__in=[background_task.pk for background_task in claimed]
+        ).update(
+            status=Status.RUNNING,
+            attempts=F("attempts") + 1,
+            updated_at=timezone.now(),
+        )
+    for background_task in claimed:
+        background_task.status = Status.RUNNING
+        background_task.attempts += 1
+    return claimed
+
+
+def run(background_task):
+    """Выполняет взятую задачу и записывает результат."""
+    func = import_string(background_task.name)
+    try:
+        func(**background_task.payload)
+    except Exception as error:
+        background_task.last_error = "".join(
+            traceback.format_exception_only(type(error), error)
+        ).strip()
+        if (
+            isinstance(error, PermanentError)
+            or background_task.attempts >= settings.TASK_MAX_ATTEMPTS
+        ):
+            background_task.status = Status.FAILED
+            if func.on_failure:
+                func.on_failure(**background_task.payload)
+        else:
+            delay = settings.TASK_RETRY_DELAY * 2 ** (
+                background_task.attempts - 1
+            )
+            background_task.status = Status.PENDING
+            background_task.run_after = timezone.now() + timedelta(
+                seconds=delay
+            )
+    else:
+        background_task.status = Status.DONE
+        background_task.last_error = ""
+    background_task.save(
+        update_fields=["status", "run_after", "last_error", "updated_at"]
+    )
+    return background_task
@@ -0,0 +1,54 @@
+"""
+Расчёт trending_score: сумма событий (добавление в избранное и в
+корзину) за последние TRENDING_WINDOW_DAYS, где вес события убывает
+вдвое каждые TRENDING_HALF_LIFE_HOURS. Пересчёт идёт одним UPDATE по
+индексам added_at и меняет только строки, у которых счёт изменился.
+"""
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Favorite, Recipe, ShoppingCart
+
+RECIPES = Recipe._meta.db_table
+FAVORITES = Favorite._meta.db_table
+CART = ShoppingCart._meta.db_table
+
+UPDATE_TRENDING_SQL = f"""
+WITH events AS (
+    SELECT recipe_id, added_at, 1.0 AS weight
+    FROM {FAVORITES}
+    WHERE added_at >= now() - make_interval(days => %(window)s)
+    UNION ALL
+    SELECT recipe_id, added_at, %(cart_weight)s AS weight
+    FROM {CART}
+    WHERE added_at >= now() - make_interval(days => %(window)s)
+),
+scores AS (
+    SELECT recipe_id, SUM(
+        weight * power(
+            0.5,
+            extract(epoch FROM now() - added_at) / (%(half_life)s * 3600.0)
+        )
+    ) AS score
+    FROM events
+    GROUP BY recipe_id
+)
+UPDATE {RECIPES} r
+SET trending_score = coalesce(s.score, 0)
+FROM {RECIPES} r2
+LEFT JOIN scores s ON s.recipe_id = r2.id
+WHERE r.id = r2.id
+  AND r.trending_score <> coalesce(s.score, 0)
+"""
+
+
+def compute_trending():
+    """Пересчитывает trending_score; возвращает число изменённых строк."""
+    with connection.cursor() as cursor:
+        cursor.execute(UPDATE_TRENDING_SQL, {
+            "window": settings.TRENDING_WINDOW_DAYS,
+            "half_life": settings.TRENDING_HALF_LIFE_HOURS,
+            "cart_weight": settings.TRENDING_CART_WEIGHT,
+        })
+        return cursor.rowcount
@@ -1,27 +1,157 @@
-from django.db.models import Sum
+import csv
+import json
+import tempfile
 
-from .models import Ingredient, RecipeIngredientAmount
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Trim
 
+from .models import ShoppingCartTotal
 
-def build_shopping_list(user):
-    shopping_data = (
-        RecipeIngredientAmount.objects.filter(
-            recipe__in=user.shopping_cart_recipes.values_list("id", flat=True)
-        )
-        .values("ingredient")
-        .annotate(total=Sum("amount"))
+DEFAULT_UNIT = "шт."
+TITLE = "Список покупок:"
+CHUNK_SIZE = 64 * 1024
+# единица → (базовая единица, множитель); совместимые единицы
+# одного продукта складываются в базовой
+UNIT_CONVERSIONS = {
+    "кг": ("г", 1000),
+    "л": ("мл", 1000),
+    "ст. л.": ("ч. л.", 3),
+}
+
+
+class UnsupportedFormat(Exception):
+    """Запрошен формат, который нельзя отдать."""
+
+
+def _base_unit():
+    return Case(
+        *(
+            When(raw_unit=unit, then=Value(base))
+            for unit, (base, _) in UNIT_CONVERSIONS.items()
+        ),
+        When(raw_unit="", then=Value(DEFAULT_UNIT)),
+        default=F("raw_unit"),
     )
 
-    ingredient_map = Ingredient.objects.in_bulk(
-        [item["ingredient"] for item in shopping_data]
+
+def _in_base_unit(field):
+    return F(field) * Case(
+        *(
+            When(raw_unit=unit, then=Value(factor))
+            for unit, (_, factor) in UNIT_CONVERSIONS.items()
+        ),
+        default=Value(1),
+        output_field=IntegerField(),
     )
 
-    lines = ["Список покупок:\n"]
 
-    for item in shopping_data:
-        ingr = ingredient_map.get(item["ingredient"])
-        if ingr:
-            unit = ingr.measurement_unit.strip() or "шт."
-            lines.append(f"{ingr.name} ({unit}) — {item['total']}")
+def shopping_list_rows(user):
+    """
+    Строки списка покупок из готовых итогов корзины одним запросом:
+    единицы приводятся к базовым и суммируются в БД, порядок — по
+    алфавиту.
+    """
+    return (
+        ShoppingCartTotal.objects.filter(user=user)
+        .alias(raw_unit=Trim("ingredient__measurement_unit"))
+        .values(name=F("ingredient__name"), unit=_base_unit())
+        .annotate(amount=Sum(_in_base_unit("total")))
+        .order_by("name", "unit")
+        .values_list("name", "unit", "amount")
+        .iterator()
+    )
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def render_txt(rows):
+    yield f"{TITLE}\n\n"
+    for name, unit, total in rows:
+        yield f"{name} ({unit}) — {total}\n"
+
 
-    return "\n".join(lines)
+def render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(("name", "measurement_unit", "amount"))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def render_json(rows):
+    separator = "["
+    for name, unit, total in rows:
+        item = {"name": name, "measurement_unit": unit, "amount": total}
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ","
+    yield "[]" if separator == "[" else "]"
+
+
+def render_pdf(rows):
+    """
+    PDF собирается во временный файл (в памяти до 1 МБ) и отдаётся
+    кусками; нужен reportlab и TTF-шрифт с кириллицей.
+    """
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.pdfgen import canvas
+    except ImportError:
+        raise UnsupportedFormat("Формат pdf недоступен на сервере.")
+    try:
+        pdfmetrics.registerFont(
+            TTFont("ShoppingList", settings.SHOPPING_LIST_PDF_FONT)
+        )
+    except Exception:
+        raise UnsupportedFormat("Не найден шрифт для формата pdf.")
+    return _render_pdf(rows, canvas, A4)
+
+
+def _render_pdf(rows, canvas, pagesize):
+    margin, line_height = 50, 18
+    width, height = pagesize
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as buffer:
+        pdf = canvas.Canvas(buffer, pagesize=pagesize)
+        pdf.setFont("ShoppingList", 16)
+        pdf.drawString(margin, height - margin, TITLE)
+        y = height - margin - 2 * line_height
+        pdf.setFont("ShoppingList", 12)
+        for name, unit, total in rows:
+            if y < margin:
+                pdf.showPage()
+                pdf.setFont("ShoppingList", 12)
+                y = height - margin
+            pdf.drawString(margin, y, f"{name} ({unit}) — {total}")
+            y -= line_height
+        pdf.save()
+        buffer.seek(0)
+        while chunk := buffer.read(CHUNK_SIZE):
+            yield chunk
+
+
+FORMATS = {
+    "txt": (render_txt, "text/plain; charset=utf-8"),
+    "csv": (render_csv, "text/csv; charset=utf-8"),
+    "json": (render_json, "application/json"),
+    "pdf": (render_pdf, "application/pdf"),
+}
+
+
+def stream_shopping_list(user, fmt="txt"):
+    """
+    Возвращает (итератор содержимого, content-type, имя файла).
+    Строки не накапливаются в памяти: из курсора сразу в ответ.
+    """
+    if fmt not in FORMATS:
+        raise UnsupportedFormat(
+            f"Допустимые форматы: {', '.join(FORMATS)}."
+        )
+    render, content_type = FORMATS[fmt]
+    content = render(shopping_list_rows(user))
+    return content, content_type, f"shopping_list.{fmt}"
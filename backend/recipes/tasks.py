@@ -0,0 +1,91 @@
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+from api.caching import invalidate_recipe_responses
+
+from . import feeds
+from .images import InvalidImage, make_thumbnail, optimize_image
+from .models import ImageStatus
+from .queue import PermanentError, periodic, purge_done, task
+from .ranking import compute_trending
+
+ImageSpec = namedtuple("ImageSpec", "source thumb status size_setting")
+
+# модель -> поля изображения, миниатюры, статуса и настройка размера
+IMAGE_SPECS = {
+    "recipes.recipe": ImageSpec(
+        "image", "image_thumb", "image_status", "RECIPE_THUMB_SIZE"
+    ),
+    "users.user": ImageSpec(
+        "avatar", "avatar_thumb", "avatar_status", "AVATAR_THUMB_SIZE"
+    ),
+}
+
+
+def mark_image_failed(model, pk, name):
+    spec = IMAGE_SPECS[model]
+    apps.get_model(model).objects.filter(
+        pk=pk, **{spec.source: name}
+    ).update(**{spec.status: ImageStatus.FAILED})
+
+
+@task(on_failure=mark_image_failed)
+def process_image(model, pk, name):
+    """
+    Сжимает загруженное изображение, создаёт миниатюру и удаляет
+    исходный файл. name — файл, для которого ставилась задача: если
+    изображение успели заменить, задача ничего не делает, а если его
+    заменили во время обработки — удаляет записанные ею файлы.
+    """
+    spec = IMAGE_SPECS[model]
+    objects = apps.get_model(model).objects.filter(pk=pk, **{spec.source: name})
+    obj = objects.first()
+    if obj is None:
+        return
+    # сжатие и запись в хранилище — без блокировки строки
+    original = getattr(obj, spec.source)
+    try:
+        with original.open("rb"):
+            image = optimize_image(original)
+    except InvalidImage as error:
+        raise PermanentError(str(error)) from error
+    thumb = make_thumbnail(image, getattr(settings, spec.size_setting))
+    original.save(image.name, image, save=False)
+    getattr(obj, spec.thumb).save(thumb.name, thumb, save=False)
+
+    with transaction.atomic():
+        # блокировка только на проверку, что изображение не заменили
+        current = objects.select_for_update().first()
+        if current is not None:
+            for field in (spec.source, spec.thumb):
+                setattr(current, field, getattr(obj, field).name)
+            setattr(current, spec.status, ImageStatus.READY)
+            current.save()
+    if current is None:
+        original.storage.delete(original.name)
+        original.storage.delete(getattr(obj, spec.thumb).name)
+    else:
+        original.storage.delete(name)
+
+
+@task()
+def fan_out_recipe(recipe_id):
+    """Добавляет опубликованный рецепт в ленты подписчиков автора."""
+    feeds.fan_out(recipe_id)
+
+
+@periodic("TASK_PURGE_INTERVAL")
+def purge_done_tasks():
+    """Чистит таблицу очереди от давно выполненных задач."""
+    purge_done()
+
+
+@periodic("TRENDING_INTERVAL")
+def refresh_trending():
+    """Пересчитывает trending_score для ?ordering=trending."""
+    if compute_trending():
+        # порядок ленты изменился — закешированные ответы и ETag устарели
+        invalidate_recipe_responses()
@@ -0,0 +1,370 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.pagination import FeedTimelinePagination
+from recipes import cart_totals, feeds, queue
+from recipes.autocomplete import IngredientIndex
+from recipes.models import (
+    BackgroundTask,
+    FeedEntry,
+    Ingredient,
+    Recipe,
+    RecipeIngredientAmount,
+    ShoppingCart,
+    ShoppingCartTotal,
+)
+from users.models import Subscription, User
+
+failures = []
+
+
+def record_failure(**payload):
+    failures.append(payload)
+
+
+@queue.task(on_failure=record_failure)
+def failing_task(permanent=False):
+    if permanent:
+        raise queue.PermanentError("навсегда")
+    raise RuntimeError("сбой")
+
+
+def create_user(number):
+    return User.objects.create_user(
+        email=f"user{number}@example.com",
+        username=f"user{number}",
+        first_name="Пользователь",
+        last_name=str(number),
+        password="test-password",
+    )
+
+
+def create_recipe(author, number):
+    return Recipe.objects.create(
+        author=author,
+        name=f"Рецепт {number}",
+        text="Описание",
+        image="recipe_images/temp.jpeg",
+        cooking_time=10,
+    )
+
+
+def publish(author, number):
+    """Рецепт и его рассылка, как после коммита в fan_out_recipe."""
+    recipe = create_recipe(author, number)
+    feeds.fan_out(recipe.pk)
+    return recipe
+
+
+@override_settings(FEED_TIMELINE_SIZE=3, FEED_PULL_THRESHOLD=10)
+class FeedTest(TestCase):
+    """Ленты подписок: рассылка, подписка, порог и обрезка."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.reader = create_user(1)
+
+    def feed_ids(self, user=None):
+        return list(
+            FeedEntry.objects.filter(user=user or self.reader)
+            .order_by("-created_at", "-recipe_id")
+            .values_list("recipe_id", flat=True)
+        )
+
+    def test_fan_out_to_followers(self):
+        Subscription.objects.create(user=self.reader, author=self.author)
+        recipe = publish(self.author, 0)
+        self.assertEqual(self.feed_ids(), [recipe.pk])
+        self.assertEqual(self.feed_ids(self.author), [])
+
+    def test_fan_out_trims_timeline(self):
+        Subscription.objects.create(user=self.reader, author=self.author)
+        recipes = [publish(self.author, number) for number in range(5)]
+        self.assertEqual(
+            self.feed_ids(), [recipe.pk for recipe in recipes[:-4:-1]]
+        )
+
+    def test_follow_and_unfollow(self):
+        recipes = [publish(self.author, number) for number in range(5)]
+        subscription = Subscription.objects.create(
+            user=self.reader, author=self.author
+        )
+        self.assertEqual(
+            self.feed_ids(), [recipe.pk for recipe in recipes[:-4:-1]]
+        )
+        subscription.delete()
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(FEED_PULL_THRESHOLD=1)
+    def test_pulled_author_not_fanned_out(self):
+        Subscription.objects.create(user=self.reader, author=self.author)
+        recipe = publish(self.author, 0)
+        self.assertEqual(self.feed_ids(), [])
+        self.assertEqual(feeds.timeline(self.reader, 10), [recipe.pk])
+
+    def test_timeline_pagination(self):
+        Subscription.objects.create(user=self.reader, author=self.author)
+        recipes = [publish(self.author, number) for number in range(3)]
+        client = APIClient()
+        client.force_authenticate(self.reader)
+
+        response = client.get("/api/recipes/feed/", {"limit": 2})
+        self.assertEqual(
+            [recipe["id"] for recipe in response.data["results"]],
+            [recipes[2].pk, recipes[1].pk],
+        )
+        response = client.get(response.data["next"])
+        self.assertEqual(
+            [recipe["id"] for recipe in response.data["results"]],
+            [recipes[0].pk],
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_empty_page_has_no_next_link(self):
+        Subscription.objects.create(user=self.reader, author=self.author)
+        for number in range(2):
+            publish(self.author, number)
+        request = Request(APIRequestFactory().get("/", {"limit": 1}))
+        request.user = self.reader
+        paginator = FeedTimelinePagination()
+        # рецепты страницы удалены между чтением ленты и выборкой
+        page = paginator.paginate_queryset(Recipe.objects.none(), request)
+        self.assertEqual(page, [])
+        self.assertIsNone(paginator.get_next_link())
+
+
+class CartTotalsTest(TestCase):
+    """Итоги списка покупок следуют за корзиной и составом рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.flour, cls.milk, cls.salt = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit="г")
+            for name in ("мука", "молоко", "соль")
+        )
+
+    def setUp(self):
+        self.pie = create_recipe(self.user, 0)
+        self.bread = create_recipe(self.user, 1)
+        self.pie_flour = RecipeIngredientAmount.objects.create(
+            recipe=self.pie, ingredient=self.flour, amount=100
+        )
+        RecipeIngredientAmount.objects.create(
+            recipe=self.pie, ingredient=self.milk, amount=200
+        )
+        RecipeIngredientAmount.objects.create(
+            recipe=self.bread, ingredient=self.flour, amount=300
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def totals(self):
+        self.assertEqual(cart_totals.find_drift(), [])
+        return dict(
+            ShoppingCartTotal.objects.filter(user=self.user)
+            .values_list("ingredient__name", "total")
+        )
+
+    def test_add_and_remove(self):
+        response = self.client.post(f"/api/recipes/{self.pie.pk}/shopping_cart/")
+        self.assertEqual(response.status_code, 201)
+        ShoppingCart.objects.create(user=self.user, recipe=self.bread)
+        self.assertEqual(self.totals(), {"мука": 400, "молоко": 200})
+
+        response = self.client.delete(
+            f"/api/recipes/{self.pie.pk}/shopping_cart/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.totals(), {"мука": 300})
+        ShoppingCart.objects.all().delete()
+        self.assertEqual(self.totals(), {})
+
+    def test_ingredient_edit(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.pie)
+        self.pie_flour.amount = 500
+        self.pie_flour.save()
+        self.assertEqual(self.totals(), {"мука": 500, "молоко": 200})
+
+        self.pie_flour.ingredient = self.salt
+        self.pie_flour.save()
+        self.assertEqual(self.totals(), {"соль": 500, "молоко": 200})
+
+        self.pie_flour.delete()
+        RecipeIngredientAmount.objects.create(
+            recipe=self.pie, ingredient=self.flour, amount=50
+        )
+        self.assertEqual(self.totals(), {"мука": 50, "молоко": 200})
+
+        response = self.client.delete(
+            f"/api/recipes/{self.pie.pk}/shopping_cart/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.totals(), {})
+
+    def test_recipe_delete(self):
+        for recipe in (self.pie, self.bread):
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        self.pie.delete()
+        self.assertEqual(self.totals(), {"мука": 300})
+
+    def test_drifted_total_not_negative(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.pie)
+        # расхождение в обход сигналов, как после ручной правки таблицы
+        ShoppingCartTotal.objects.filter(ingredient=self.flour).update(total=1)
+        cart_totals.remove_recipe(self.pie.pk, self.user.pk)
+        self.assertFalse(ShoppingCartTotal.objects.exists())
+
+
+@override_settings(TASK_RETRY_DELAY=10, TASK_MAX_ATTEMPTS=3)
+class QueueTest(TestCase):
+    """Повторы, исчерпание попыток, брошенные и выполненные задачи."""
+
+    def setUp(self):
+        failures.clear()
+
+    def create_task(self, **fields):
+        return BackgroundTask.objects.create(
+            name=failing_task.task_name, **fields
+        )
+
+    def claim_and_run(self):
+        (claimed,) = queue.claim()
+        return queue.run(claimed)
+
+    def test_retry_backoff(self):
+        background_task = self.create_task()
+        for attempt, delay in ((1, 10), (2, 20)):
+            started = timezone.now()
+            background_task = self.claim_and_run()
+            self.assertEqual(background_task.status, queue.Status.PENDING)
+            self.assertEqual(background_task.attempts, attempt)
+            self.assertIn("сбой", background_task.last_error)
+            self.assertGreaterEqual(
+                background_task.run_after, started + timedelta(seconds=delay)
+            )
+            # следующая попытка не раньше run_after
+            self.assertEqual(queue.claim(), [])
+            BackgroundTask.objects.update(run_after=timezone.now())
+        self.assertEqual(failures, [])
+
+    def test_max_attempts(self):
+        self.create_task(attempts=2)
+        background_task = self.claim_and_run()
+        self.assertEqual(background_task.status, queue.Status.FAILED)
+        self.assertEqual(failures, [{}])
+
+    def test_permanent_error(self):
+        self.create_task(payload={"permanent": True})
+        background_task = self.claim_and_run()
+        self.assertEqual(background_task.status, queue.Status.FAILED)
+        self.assertEqual(background_task.attempts, 1)
+        self.assertEqual(failures, [{"permanent": True}])
+
+    @override_settings(TASK_STALE_TIMEOUT=60)
+    def test_requeue_stale(self):
+        stale = self.create_task(status=queue.Status.RUNNING)
+        fresh = self.create_task(status=queue.Status.RUNNING)
+        BackgroundTask.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=61)
+        )
+        self.assertEqual(queue.requeue_stale(), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, queue.Status.PENDING)
+        self.assertEqual(fresh.status, queue.Status.RUNNING)
+
+    @override_settings(TASK_KEEP_DONE=60)
+    def test_purge_done(self):
+        old = timezone.now() - timedelta(seconds=61)
+        for status in queue.Status.values:
+            self.create_task(status=status)
+        BackgroundTask.objects.update(updated_at=old)
+        recent = self.create_task(status=queue.Status.DONE)
+        self.assertEqual(queue.purge_done(), 1)
+        self.assertEqual(
+            BackgroundTask.objects.filter(status=queue.Status.DONE).get(),
+            recent,
+        )
+
+    @override_settings(TEST_INTERVAL=60)
+    def test_run_periodic(self):
+        cache.clear()
+        calls = []
+        jobs = {"job": (lambda: calls.append(1), "TEST_INTERVAL")}
+        with mock.patch.dict(queue.PERIODIC, jobs, clear=True):
+            self.assertEqual(queue.run_periodic(), [("job", None)])
+            self.assertEqual(queue.run_periodic(), [])
+        self.assertEqual(calls, [1])
+
+
+class QueueClaimTest(TransactionTestCase):
+    """Задачу, заблокированную другим воркером, claim пропускает."""
+
+    def test_skip_locked(self):
+        locked, free = BackgroundTask.objects.bulk_create(
+            BackgroundTask(name=failing_task.task_name) for _ in range(2)
+        )
+        acquired, release = threading.Event(), threading.Event()
+
+        def other_worker():
+            try:
+                with transaction.atomic():
+                    BackgroundTask.objects.select_for_update().get(
+                        pk=locked.pk
+                    )
+                    acquired.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        try:
+            self.assertTrue(acquired.wait(10))
+            claimed = queue.claim(limit=2)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual([task.pk for task in claimed], [free.pk])
+
+
+class IngredientIndexTest(SimpleTestCase):
+    """Автодополнение: точное совпадение, префикс, затем подстрока."""
+
+    index = IngredientIndex([
+        (1, "Сахарная пудра", "г"),
+        (2, "сахар", "г"),
+        (3, "Ванильный сахар", "г"),
+        (4, "Сахар", "кг"),
+        (5, "Ёжевика", "г"),
+        (6, "соль", "г"),
+    ])
+
+    def search(self, query, limit=10):
+        return [entry.id for entry in self.index.search(query, limit)]
+
+    def test_ranking(self):
+        self.assertEqual(self.search("Сахар"), [2, 4, 1, 3])
+
+    def test_normalization(self):
+        self.assertEqual(self.search("  САХАРН"), [1])
+        self.assertEqual(self.search("ежев"), [5])
+
+    def test_limit(self):
+        self.assertEqual(self.search("сахар", limit=3), [2, 4, 1])
+        self.assertEqual(self.search("", limit=2), [3, 5])
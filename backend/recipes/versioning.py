@@ -0,0 +1,38 @@
+"""
+Версии кешей в общем кеше Django: при изменении данных версия
+увеличивается, и все процессы перестают видеть старые записи.
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # время вместо 1, чтобы не совпасть с версией до вытеснения ключа
+        version = time.time_ns()
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+# общая версия справочников (теги и ингредиенты)
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def invalidate_catalog():
+    """Помечает устаревшими кеши тегов и ингредиентов во всех процессах."""
+    bump_version(CATALOG_VERSION_KEY)
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="avatar_thumb",
+            field=models.ImageField(
+                blank=True, default="", editable=False, upload_to="avatars/thumbs/"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_user_avatar_thumb"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="avatar_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "В обработке"),
+                    ("ready", "Готово"),
+                    ("failed", "Ошибка"),
+                ],
+                default="ready",
+                editable=False,
+                max_length=16,
+            ),
+        ),
+    ]
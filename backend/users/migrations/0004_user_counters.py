@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_avatar_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Подписчики"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="following_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Подписки"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Рецепты"
+            ),
+        ),
+    ]
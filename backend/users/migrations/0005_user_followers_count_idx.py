@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:35
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("users", "0004_user_counters"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                fields=["followers_count"],
+                name="user_followers_count_idx",
+            ),
+        ),
+    ]
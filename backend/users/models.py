@@ -3,6 +3,8 @@ from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
 
+from recipes.models import ImageStatus
+
 username_validator = UnicodeUsernameValidator()
 # Константы
 MAX_USERNAME_LENGTH = 150
@@ -41,6 +43,35 @@ class User(AbstractUser):
         help_text="Введите вашу фамилию",
     )
     avatar = models.ImageField(upload_to="avatars/", blank=True, default="")
+    avatar_thumb = models.ImageField(
+        upload_to="avatars/thumbs/",
+        blank=True,
+        default="",
+        editable=False,
+    )
+    avatar_status = models.CharField(
+        max_length=16,
+        choices=ImageStatus.choices,
+        default=ImageStatus.READY,
+        editable=False,
+    )
+    # счётчики обновляются через F() вместе с изменением связей,
+    # расхождения исправляет manage.py reconcile_counters
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Рецепты",
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Подписчики",
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Подписки",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
@@ -49,22 +80,18 @@ class User(AbstractUser):
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
         ordering = ["username"]
+        indexes = [
+            # авторы, читаемые лентой подписок при запросе:
+            # followers_count >= FEED_PULL_THRESHOLD
+            models.Index(
+                fields=["followers_count"],
+                name="user_followers_count_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.username} ({self.email})"
 
-    @property
-    def followers_count(self):
-        """Количество подписчиков.
-        (людей, которые подписаны на этого пользователя)
-        """
-        return self.subscribers.count()
-
-    @property
-    def following_count(self):
-        """Количество авторов, на которых подписан пользователь"""
-        return self.subscriptions.count()
-
     @property
     def favorited_recipes(self):
         """Рецепты, добавленные пользователем в избранное."""